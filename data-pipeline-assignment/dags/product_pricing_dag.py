@@ -3,6 +3,7 @@ Daily Product Pricing Intelligence Pipeline
 Orchestrates scraping, exchange rate fetching, transformation, and loading
 """
 import os
+import re
 import logging
 from datetime import datetime, timedelta
 from airflow import DAG
@@ -13,22 +14,24 @@ from airflow.utils.dates import days_ago
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
 
+from config import Config
 from scrape_products import scrape_books
-from fetch_exchange_rate import fetch_exchange_rate, store_exchange_rate, get_latest_exchange_rate
-from transform_data import transform_products
-from load_data import load_products_replace, load_raw_products
+from fetch_exchange_rate import get_latest_exchange_rate
+from deferrable import FetchExchangeRateOperator
+from transform_data import iter_transform_tables
+from load_data import (
+    load_products_replace,
+    load_raw_products,
+    get_raw_products,
+    write_tables_parquet,
+    read_products_parquet
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Database configuration from environment variables
-DB_CONFIG = {
-    'host': os.getenv('POSTGRES_HOST', 'postgres'),
-    'port': os.getenv('POSTGRES_PORT', 5432),
-    'database': os.getenv('POSTGRES_DB', 'pipeline_db'),
-    'user': os.getenv('POSTGRES_USER', 'pipeline_user'),
-    'password': os.getenv('POSTGRES_PASSWORD', 'pipeline_pass')
-}
+# Database configuration, read and validated once by scripts/config.py
+DB_CONFIG = Config.get_db_config()
 
 # Default arguments for the DAG
 default_args = {
@@ -56,12 +59,12 @@ def scrape_products_task(**context):
         
         logger.info(f"Successfully scraped {len(products)} products")
         
-        # Optionally store raw products
-        if load_raw_products(products, DB_CONFIG):
-            logger.info("Raw products stored in database")
+        # Store raw products; the transform task reads them back from
+        # raw_products instead of pulling the full list through XCom
+        if not load_raw_products(products, DB_CONFIG):
+            raise ValueError("Failed to store raw products")
         
-        # Push to XCom for next tasks
-        context['ti'].xcom_push(key='raw_products', value=products)
+        logger.info("Raw products stored in database")
         
         return len(products)
         
@@ -70,35 +73,6 @@ def scrape_products_task(**context):
         raise
 
 
-def fetch_and_store_exchange_rate_task(**context):
-    """
-    Task 2: Fetch GBP to INR exchange rate and store in staging table
-    """
-    logger.info("Fetching exchange rate...")
-    
-    try:
-        # Fetch exchange rate
-        exchange_rate = fetch_exchange_rate(base_currency='GBP', target_currency='INR')
-        
-        if not exchange_rate:
-            raise ValueError("Failed to fetch exchange rate")
-        
-        # Store in database
-        if not store_exchange_rate(exchange_rate, DB_CONFIG, 'GBP', 'INR'):
-            raise ValueError("Failed to store exchange rate")
-        
-        logger.info(f"Exchange rate stored: 1 GBP = {exchange_rate} INR")
-        
-        # Push to XCom
-        context['ti'].xcom_push(key='exchange_rate', value=exchange_rate)
-        
-        return exchange_rate
-        
-    except Exception as e:
-        logger.error(f"Error in fetch_and_store_exchange_rate_task: {e}")
-        raise
-
-
 def transform_products_task(**context):
     """
     Task 3: Transform raw products using exchange rate from staging
@@ -106,12 +80,13 @@ def transform_products_task(**context):
     logger.info("Transforming products...")
     
     try:
-        # Pull raw products from XCom
         ti = context['ti']
-        raw_products = ti.xcom_pull(key='raw_products', task_ids='scrape_products')
+        
+        # Read raw products written by the scrape task
+        raw_products = get_raw_products(DB_CONFIG)
         
         if not raw_products:
-            raise ValueError("No raw products found in XCom")
+            raise ValueError("No raw products found in raw_products table")
         
         # Get exchange rate from staging table (most reliable)
         exchange_rate = get_latest_exchange_rate(DB_CONFIG)
@@ -124,18 +99,26 @@ def transform_products_task(**context):
         if not exchange_rate:
             raise ValueError("No exchange rate available")
         
-        # Transform products
-        transformed_products = transform_products(raw_products, exchange_rate)
+        # Hand off as a parquet file; only its path goes through XCom
+        os.makedirs(Config.DATA_DIR, exist_ok=True)
+        run_id = re.sub(r'[^\w.-]', '_', context['run_id'])
+        path = os.path.join(Config.DATA_DIR, f"transformed_products_{run_id}.parquet")
         
-        if not transformed_products:
+        # Transform products column-wise, streaming each batch straight into the file
+        transformed_count = write_tables_parquet(
+            iter_transform_tables(raw_products, exchange_rate),
+            path
+        )
+        
+        if not transformed_count:
+            os.remove(path)
             raise ValueError("No products were transformed")
         
-        logger.info(f"Successfully transformed {len(transformed_products)} products")
+        logger.info(f"Successfully transformed {transformed_count} products")
         
-        # Push to XCom
-        ti.xcom_push(key='transformed_products', value=transformed_products)
+        ti.xcom_push(key='transformed_products_path', value=path)
         
-        return len(transformed_products)
+        return transformed_count
         
     except Exception as e:
         logger.error(f"Error in transform_products_task: {e}")
@@ -149,20 +132,28 @@ def load_products_task(**context):
     logger.info("Loading products to database...")
     
     try:
-        # Pull transformed products from XCom
+        # Read transformed products from the file written by the transform task
         ti = context['ti']
-        transformed_products = ti.xcom_pull(key='transformed_products', task_ids='transform_products')
+        path = ti.xcom_pull(key='transformed_products_path', task_ids='transform_products')
+        
+        if not path or not os.path.exists(path):
+            raise ValueError(f"Transformed products file not found: {path}")
+        
+        transformed_products = read_products_parquet(path)
         
-        if not transformed_products:
-            raise ValueError("No transformed products found in XCom")
+        if not transformed_products.num_rows:
+            raise ValueError("No transformed products found")
         
         # Load products (using REPLACE strategy for full refresh)
         if not load_products_replace(transformed_products, DB_CONFIG):
             raise ValueError("Failed to load products")
         
-        logger.info(f"Successfully loaded {len(transformed_products)} products")
+        logger.info(f"Successfully loaded {transformed_products.num_rows} products")
         
-        return len(transformed_products)
+        # Keep the file until the load succeeds so retries can reuse it
+        os.remove(path)
+        
+        return transformed_products.num_rows
         
     except Exception as e:
         logger.error(f"Error in load_products_task: {e}")
@@ -177,6 +168,7 @@ with DAG(
     schedule_interval='@daily',  # Run daily
     start_date=days_ago(1),
     catchup=False,
+    max_active_runs=1,  # Runs share the raw_products staging table
     tags=['pricing', 'etl', 'web-scraping']
 ) as dag:
     
@@ -188,10 +180,13 @@ with DAG(
     )
     
     # Task 2: Fetch and store exchange rate
-    exchange_rate_task = PythonOperator(
+    # Deferrable: the HTTP wait runs in the triggerer, freeing the worker slot
+    exchange_rate_task = FetchExchangeRateOperator(
         task_id='fetch_exchange_rate',
-        python_callable=fetch_and_store_exchange_rate_task,
-        provide_context=True
+        db_config=DB_CONFIG,
+        base_currency='GBP',
+        target_currency='INR',
+        api_url=Config.get_exchange_rate_config()['api_url']
     )
     
     # Task 3: Transform products
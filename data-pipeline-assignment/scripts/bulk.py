@@ -0,0 +1,185 @@
+"""
+Reusable binary COPY writer for bulk loads into PostgreSQL
+Rows are encoded as they are added and sent in bounded COPY batches
+"""
+import functools
+import io
+import logging
+import struct
+from collections.abc import Mapping
+from dataclasses import is_dataclass
+from decimal import Decimal
+from typing import Any, Sequence, Tuple, Union
+from pgcopy import CopyManager, inspect
+from pgcopy.copy import BINCOPY_HEADER, BINCOPY_TRAILER, array, diagnostic, encode, null, numeric
+from psycopg2.extensions import connection as Connection, encodings
+
+logger = logging.getLogger(__name__)
+
+# Bytes sent per COPY data message (psycopg2 defaults to 8 KiB)
+COPY_CHUNK_SIZE = 64 * 1024
+
+# Encoded bytes buffered before add() sends a COPY batch on its own
+FLUSH_BYTES = 8 * 1024 * 1024
+
+
+def _numeric(value: Any) -> Tuple[str, list]:
+    """pgcopy's NUMERIC encoder, also accepting floats (as their shortest repr) and ints"""
+    if isinstance(value, float):
+        value = Decimal(repr(value))
+    elif isinstance(value, int):
+        value = Decimal(value)
+    # NaN is a valid NUMERIC, but numeric() would also encode infinities
+    # as NaN, so reject those rather than load the wrong value
+    if isinstance(value, Decimal) and value.is_infinite():
+        raise ValueError(f"Cannot load infinite value {value} into a NUMERIC column")
+    return numeric(value)
+
+
+def _max_length(att, _, formatter):
+    """
+    Formatter wrapper rejecting strings longer than a VARCHAR/CHAR column
+
+    Replaces pgcopy's maxsize, which silently truncates them instead of
+    failing with "value too long" like INSERT does.
+    """
+    if att.type_name not in ('varchar', 'bpchar') or att.type_mod < 0:
+        return formatter
+
+    # PostgreSQL reports the declared length + 4
+    length = att.type_mod - 4
+
+    def check(value):
+        if len(value) > length:
+            raise ValueError(f"Value too long for {att.type_name}({length}): {len(value)} characters")
+        return formatter(value)
+
+    return check
+
+
+class _CopyManager(CopyManager):
+    """
+    CopyManager whose NUMERIC columns take floats and ints as well as
+    Decimals, and whose VARCHAR columns reject over-length values
+    """
+
+    type_formatters = {'numeric': _numeric}
+
+    def compile(self):
+        """Build the column formatters as pgcopy does, with _max_length in place of maxsize"""
+        self.formatters = []
+        type_dict = inspect.get_types(self.conn, self.schema, self.table)
+        encoding = encodings[self.conn.encoding]
+        for column in self.cols:
+            att = type_dict.get(column)
+            if att is None:
+                raise ValueError(f'"{column}" is not a column of table "{self.schema}"."{self.table}"')
+            wrappers = (encode, _max_length, array, diagnostic, null)
+            self.formatters.append(
+                functools.reduce(lambda f, wrap: wrap(att, encoding, f), wrappers, self.get_formatter(att))
+            )
+
+
+class BulkWriter:
+    """
+    Load rows into a table with binary COPY
+
+    Rows are encoded into an in-memory buffer by add() and sent with one
+    COPY per flush. Leaving the with-block flushes whatever is left;
+    committing is up to the caller, so TRUNCATE and COPY can share a
+    transaction.
+
+        with BulkWriter(conn, 'products', PRODUCT_COLUMNS) as writer:
+            writer.truncate()
+            for product in products:
+                writer.add(product)
+        conn.commit()
+    """
+
+    def __init__(
+        self,
+        conn: Connection,
+        table: str,
+        columns: Sequence[str],
+        flush_bytes: int = FLUSH_BYTES
+    ):
+        self.conn = conn
+        self.table = table
+        self.columns: Tuple[str, ...] = tuple(columns)
+        self.flush_bytes = flush_bytes
+        self.rows_written = 0
+
+        # pgcopy looks up the column types once and supplies the encoders
+        self._formatters = _CopyManager(conn, table, self.columns).formatters
+        self._copy_sql = f"COPY {table} ({', '.join(self.columns)}) FROM STDIN WITH (FORMAT binary)"
+        self._reset()
+
+    def __enter__(self) -> 'BulkWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if exc_type is None:
+            self.flush()
+        else:
+            self._reset()
+        return False
+
+    def _reset(self) -> None:
+        """Start a new, empty COPY batch"""
+        self._buffer = io.BytesIO()
+        self._buffer.write(BINCOPY_HEADER)
+        self._pending = 0
+
+    def add(self, row: Union[Mapping, Sequence[Any], Any]) -> None:
+        """
+        Encode one row into the current batch
+
+        Args:
+            row: Mapping keyed by column name or dataclass record with
+                attributes named after the columns (missing ones load as
+                NULL), or a sequence of exactly one value per column in
+                column order (ValueError otherwise)
+        """
+        if isinstance(row, Mapping):
+            row = [row.get(col) for col in self.columns]
+        elif is_dataclass(row):
+            row = [getattr(row, col, None) for col in self.columns]
+        elif len(row) != len(self.columns):
+            # The tuple header would still claim every column, corrupting the stream
+            raise ValueError(f"Row has {len(row)} values, expected {len(self.columns)} for {self.table}")
+
+        fmt = ['>h']
+        data = [len(self.columns)]
+        for formatter, value in zip(self._formatters, row):
+            f, d = formatter(value)
+            fmt.append(f)
+            data.extend(d)
+        self._buffer.write(struct.pack(''.join(fmt), *data))
+        self._pending += 1
+
+        if self._buffer.tell() >= self.flush_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Send the buffered rows with a single COPY
+        """
+        if not self._pending:
+            return
+
+        self._buffer.write(BINCOPY_TRAILER)
+        self._buffer.seek(0)
+
+        with self.conn.cursor() as cursor:
+            cursor.copy_expert(self._copy_sql, self._buffer, size=COPY_CHUNK_SIZE)
+
+        self.rows_written += self._pending
+        self._reset()
+
+    def truncate(self) -> None:
+        """
+        Empty the target table and discard any rows not yet flushed
+        """
+        self._reset()
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"TRUNCATE TABLE {self.table}")
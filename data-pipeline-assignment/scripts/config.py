@@ -3,20 +3,21 @@ Configuration module for the data pipeline
 Centralizes all configuration settings
 """
 import os
-from typing import Dict
+from types import MappingProxyType
+from typing import Any, Dict, Mapping
 
 
 class Config:
     """Pipeline configuration settings"""
     
-    # Database Configuration
-    DB_CONFIG: Dict[str, any] = {
+    # Database Configuration (read once at import, immutable)
+    DB_CONFIG: Mapping[str, Any] = MappingProxyType({
         'host': os.getenv('POSTGRES_HOST', 'postgres'),
         'port': int(os.getenv('POSTGRES_PORT', 5432)),
         'database': os.getenv('POSTGRES_DB', 'pipeline_db'),
         'user': os.getenv('POSTGRES_USER', 'pipeline_user'),
         'password': os.getenv('POSTGRES_PASSWORD', 'pipeline_pass')
-    }
+    })
     
     # Scraping Configuration
     SCRAPING_CONFIG = {
@@ -44,6 +45,9 @@ class Config:
     # Loading Strategy
     LOAD_STRATEGY = os.getenv('LOAD_STRATEGY', 'replace')  # 'replace' or 'upsert'
     
+    # Local directory for files handed between tasks (must be shared by workers)
+    DATA_DIR = os.getenv('PIPELINE_DATA_DIR', '/tmp/pipeline')
+    
     # Logging Configuration
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     
@@ -64,7 +68,13 @@ class Config:
     
     @classmethod
     def validate(cls) -> bool:
-        """Validate all configuration settings"""
+        """
+        Validate all configuration settings
+        
+        Missing database variables are fatal when AIRFLOW__ENV is 'prod',
+        so a misconfigured deployment fails at DAG parse time instead of
+        timing out on connect inside a task.
+        """
         required_env_vars = [
             'POSTGRES_HOST',
             'POSTGRES_DB',
@@ -74,6 +84,9 @@ class Config:
         
         missing = [var for var in required_env_vars if not os.getenv(var)]
         
+        if missing and os.getenv('AIRFLOW__ENV') == 'prod':
+            raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
+        
         if missing:
             print(f"Warning: Missing environment variables: {', '.join(missing)}")
             print("Using default values")
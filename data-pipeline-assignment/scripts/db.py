@@ -0,0 +1,93 @@
+"""
+Shared PostgreSQL connection pooling for the pipeline scripts
+Reuses live connections instead of reconnecting on every call
+"""
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from psycopg2.extensions import connection as Connection, make_dsn
+from psycopg2.pool import ThreadedConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Pool size bounds per distinct database configuration
+POOL_MIN_CONN = 1
+POOL_MAX_CONN = 4
+
+_pools: Dict[tuple, ThreadedConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_config: Dict) -> ThreadedConnectionPool:
+    """
+    Get (or lazily create) the connection pool for a database configuration
+
+    Args:
+        db_config: Database connection configuration
+
+    Returns:
+        Process-wide ThreadedConnectionPool for this configuration
+    """
+    key = tuple(sorted(dict(db_config).items()))
+
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                logger.info(f"Creating connection pool for {db_config.get('host')}/{db_config.get('database')}")
+                pool = ThreadedConnectionPool(POOL_MIN_CONN, POOL_MAX_CONN, make_dsn(**db_config))
+                _pools[key] = pool
+
+    return pool
+
+
+@contextmanager
+def get_conn(db_config: Optional[Dict] = None, conn: Optional[Connection] = None) -> Iterator[Connection]:
+    """
+    Borrow a database connection for the duration of a block
+
+    If an existing connection is passed it is used as-is and left open.
+    Otherwise a connection is taken from the pool for db_config and
+    returned to it afterwards. The transaction is rolled back if the
+    block raises.
+
+    Args:
+        db_config: Database connection configuration
+        conn: Optional existing connection to use instead of the pool
+
+    Yields:
+        An open psycopg2 connection
+    """
+    pooled = conn is None
+    if pooled:
+        if db_config is None:
+            raise ValueError("Either db_config or conn must be provided")
+        pool = get_pool(db_config)
+        conn = pool.getconn()
+
+    try:
+        yield conn
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        if pooled:
+            # Broken connections are discarded rather than recycled
+            pool.putconn(conn, close=bool(conn.closed))
+
+
+def close_pools() -> None:
+    """
+    Close all pooled connections
+    """
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
+
+
+atexit.register(close_pools)
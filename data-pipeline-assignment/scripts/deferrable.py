@@ -0,0 +1,145 @@
+"""
+Deferrable Airflow operator for the exchange rate fetch
+The HTTP wait runs in the triggerer, so no worker slot is held meanwhile
+"""
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+import aiohttp
+from airflow.exceptions import AirflowException
+from airflow.models import BaseOperator
+from airflow.triggers.base import BaseTrigger, TriggerEvent
+from fetch_exchange_rate import (
+    RETRY_BACKOFF_FACTOR,
+    RETRY_STATUS_FORCELIST,
+    RETRY_TOTAL,
+    parse_exchange_rate_response,
+    store_exchange_rate
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ExchangeRateTrigger(BaseTrigger):
+    """Fetch an exchange rate asynchronously inside the triggerer"""
+
+    def __init__(
+        self,
+        base_currency: str = "GBP",
+        target_currency: str = "INR",
+        api_url: str = "https://api.exchangerate.host/latest",
+        timeout: int = 10
+    ):
+        super().__init__()
+        self.base_currency = base_currency
+        self.target_currency = target_currency
+        self.api_url = api_url
+        self.timeout = timeout
+
+    def serialize(self) -> Tuple[str, Dict[str, Any]]:
+        """Serialize trigger arguments for the triggerer process"""
+        return (
+            "deferrable.ExchangeRateTrigger",
+            {
+                'base_currency': self.base_currency,
+                'target_currency': self.target_currency,
+                'api_url': self.api_url,
+                'timeout': self.timeout
+            }
+        )
+
+    async def _get_with_retry(self, session: aiohttp.ClientSession, params: Dict) -> Dict:
+        """Request the API, retrying transient failures with exponential backoff"""
+        for attempt in range(RETRY_TOTAL + 1):
+            last_attempt = attempt == RETRY_TOTAL
+            try:
+                async with session.get(self.api_url, params=params) as response:
+                    if response.status not in RETRY_STATUS_FORCELIST or last_attempt:
+                        response.raise_for_status()
+                        return await response.json(content_type=None)
+                    reason = f"HTTP {response.status}"
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if last_attempt:
+                    raise
+                reason = str(e) or type(e).__name__
+
+            delay = RETRY_BACKOFF_FACTOR * (2 ** attempt)
+            logger.warning(f"Exchange rate request failed ({reason}), retrying in {delay}s")
+            await asyncio.sleep(delay)
+
+    async def run(self) -> AsyncIterator[TriggerEvent]:
+        """Issue the API request and emit a single event with the result"""
+        params = {
+            'base': self.base_currency,
+            'symbols': self.target_currency
+        }
+
+        try:
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                data = await self._get_with_retry(session, params)
+
+            exchange_rate = parse_exchange_rate_response(data, self.base_currency, self.target_currency)
+
+            if exchange_rate:
+                yield TriggerEvent({'status': 'success', 'exchange_rate': exchange_rate})
+            else:
+                yield TriggerEvent({'status': 'error', 'message': "Exchange rate not found in response"})
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            yield TriggerEvent({'status': 'error', 'message': f"Error fetching exchange rate: {e}"})
+        except (ValueError, TypeError, AttributeError) as e:
+            # Body that is not JSON, or JSON not shaped like a rates response
+            yield TriggerEvent({'status': 'error', 'message': f"Invalid exchange rate response: {e}"})
+
+
+class FetchExchangeRateOperator(BaseOperator):
+    """
+    Fetch the exchange rate via ExchangeRateTrigger, then store it
+
+    Pushes the rate to XCom under key 'exchange_rate' and returns it.
+    """
+
+    def __init__(
+        self,
+        *,
+        db_config: Dict,
+        base_currency: str = "GBP",
+        target_currency: str = "INR",
+        api_url: str = "https://api.exchangerate.host/latest",
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.db_config = db_config
+        self.base_currency = base_currency
+        self.target_currency = target_currency
+        self.api_url = api_url
+
+    def execute(self, context: Dict) -> None:
+        """Defer to the triggerer while the HTTP request is in flight"""
+        logger.info(f"Deferring exchange rate fetch: {self.base_currency} -> {self.target_currency}")
+        self.defer(
+            trigger=ExchangeRateTrigger(
+                base_currency=self.base_currency,
+                target_currency=self.target_currency,
+                api_url=self.api_url
+            ),
+            method_name='execute_complete'
+        )
+
+    def execute_complete(self, context: Dict, event: Optional[Dict] = None) -> float:
+        """Resume on a worker once the trigger has fired"""
+        if not event or event.get('status') != 'success':
+            message = event.get('message') if event else "No event received"
+            raise AirflowException(f"Failed to fetch exchange rate: {message}")
+
+        exchange_rate = event['exchange_rate']
+
+        if not store_exchange_rate(exchange_rate, self.db_config, self.base_currency, self.target_currency):
+            raise AirflowException("Failed to store exchange rate")
+
+        logger.info(f"Exchange rate stored: 1 {self.base_currency} = {exchange_rate} {self.target_currency}")
+
+        context['ti'].xcom_push(key='exchange_rate', value=exchange_rate)
+
+        return exchange_rate
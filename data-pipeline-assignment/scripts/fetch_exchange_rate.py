@@ -3,15 +3,78 @@ Fetch GBP to INR exchange rate from public API
 Store in PostgreSQL staging table
 """
 import logging
+import weakref
 from datetime import date
 from typing import Optional, Dict
 import requests
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from db import get_conn
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Transient API failures are retried up to RETRY_TOTAL times with
+# urllib3's exponential backoff (scaled by RETRY_BACKOFF_FACTOR) before
+# giving up to Airflow's much slower task-level retry
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_FORCELIST = (429, 500, 502, 503, 504)
+
+# Shared session applying the retry policy above
+SESSION = requests.Session()
+_adapter = HTTPAdapter(max_retries=Retry(
+    total=RETRY_TOTAL,
+    backoff_factor=RETRY_BACKOFF_FACTOR,
+    status_forcelist=RETRY_STATUS_FORCELIST
+))
+SESSION.mount('https://', _adapter)
+SESSION.mount('http://', _adapter)
+
+# Server-side prepared upsert; prepared once per connection
+UPSERT_STATEMENT = "upsert_exchange_rate"
+
+_PREPARE_UPSERT = f"""
+    PREPARE {UPSERT_STATEMENT} (date, text, text, numeric) AS
+    INSERT INTO staging_exchange_rates (date, base_currency, target_currency, exchange_rate)
+    VALUES ($1, $2, $3, $4)
+    ON CONFLICT (date, base_currency, target_currency)
+    DO UPDATE SET 
+        exchange_rate = EXCLUDED.exchange_rate,
+        fetched_at = CURRENT_TIMESTAMP
+"""
+
+# Connections that already hold the prepared upsert statement
+_prepared_connections = weakref.WeakSet()
+
+
+def parse_exchange_rate_response(data: Dict, base_currency: str, target_currency: str) -> Optional[float]:
+    """
+    Extract the target rate from an exchangerate.host JSON response
+    
+    Args:
+        data: Decoded JSON response body
+        base_currency: Base currency code
+        target_currency: Target currency code
+        
+    Returns:
+        Exchange rate as float, or None if the response has no usable rate
+    """
+    if not data.get('success', True):
+        logger.error(f"API returned error: {data}")
+        return None
+    
+    rates = data.get('rates', {})
+    exchange_rate = rates.get(target_currency)
+    
+    if exchange_rate:
+        logger.info(f"Exchange rate fetched: 1 {base_currency} = {exchange_rate} {target_currency}")
+        return float(exchange_rate)
+    else:
+        logger.error(f"Exchange rate not found in response: {data}")
+        return None
+
 
 def fetch_exchange_rate(
     base_currency: str = "GBP",
@@ -37,24 +100,12 @@ def fetch_exchange_rate(
         
         logger.info(f"Fetching exchange rate: {base_currency} -> {target_currency}")
         
-        response = requests.get(api_url, params=params, timeout=10)
+        response = SESSION.get(api_url, params=params, timeout=10)
         response.raise_for_status()
         
         data = response.json()
         
-        if not data.get('success', True):
-            logger.error(f"API returned error: {data}")
-            return None
-        
-        rates = data.get('rates', {})
-        exchange_rate = rates.get(target_currency)
-        
-        if exchange_rate:
-            logger.info(f"Exchange rate fetched: 1 {base_currency} = {exchange_rate} {target_currency}")
-            return float(exchange_rate)
-        else:
-            logger.error(f"Exchange rate not found in response: {data}")
-            return None
+        return parse_exchange_rate_response(data, base_currency, target_currency)
             
     except requests.RequestException as e:
         logger.error(f"Error fetching exchange rate: {e}")
@@ -66,9 +117,10 @@ def fetch_exchange_rate(
 
 def store_exchange_rate(
     exchange_rate: float,
-    db_config: Dict,
+    db_config: Optional[Dict] = None,
     base_currency: str = "GBP",
-    target_currency: str = "INR"
+    target_currency: str = "INR",
+    conn=None
 ) -> bool:
     """
     Store exchange rate in PostgreSQL staging table
@@ -78,34 +130,29 @@ def store_exchange_rate(
         db_config: Database connection configuration
         base_currency: Base currency code
         target_currency: Target currency code
+        conn: Optional existing connection to reuse instead of the pool
         
     Returns:
         True if successful, False otherwise
     """
     try:
-        conn = psycopg2.connect(**db_config)
-        cursor = conn.cursor()
-        
         today = date.today()
         
-        # Upsert exchange rate for today
-        insert_query = """
-            INSERT INTO staging_exchange_rates (date, base_currency, target_currency, exchange_rate)
-            VALUES (%s, %s, %s, %s)
-            ON CONFLICT (date, base_currency, target_currency)
-            DO UPDATE SET 
-                exchange_rate = EXCLUDED.exchange_rate,
-                fetched_at = CURRENT_TIMESTAMP
-        """
-        
-        cursor.execute(insert_query, (today, base_currency, target_currency, exchange_rate))
-        conn.commit()
+        with get_conn(db_config, conn) as conn, conn.cursor() as cursor:
+            # Prepared statements survive rollbacks, so this runs once per session
+            if conn not in _prepared_connections:
+                cursor.execute(_PREPARE_UPSERT)
+                _prepared_connections.add(conn)
+            
+            # Upsert exchange rate for today
+            cursor.execute(
+                f"EXECUTE {UPSERT_STATEMENT} (%s, %s, %s, %s)",
+                (today, base_currency, target_currency, exchange_rate)
+            )
+            conn.commit()
         
         logger.info(f"Exchange rate stored successfully for {today}")
         
-        cursor.close()
-        conn.close()
-        
         return True
         
     except psycopg2.Error as e:
@@ -116,20 +163,18 @@ def store_exchange_rate(
         return False
 
 
-def get_latest_exchange_rate(db_config: Dict) -> Optional[float]:
+def get_latest_exchange_rate(db_config: Optional[Dict] = None, conn=None) -> Optional[float]:
     """
     Retrieve the latest exchange rate from staging table
     
     Args:
         db_config: Database connection configuration
+        conn: Optional existing connection to reuse instead of the pool
         
     Returns:
         Latest exchange rate or None
     """
     try:
-        conn = psycopg2.connect(**db_config)
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
         query = """
             SELECT exchange_rate, date
             FROM staging_exchange_rates
@@ -137,15 +182,14 @@ def get_latest_exchange_rate(db_config: Dict) -> Optional[float]:
             LIMIT 1
         """
         
-        cursor.execute(query)
-        result = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
+        with get_conn(db_config, conn) as conn, conn.cursor() as cursor:
+            cursor.execute(query)
+            result = cursor.fetchone()
         
         if result:
-            logger.info(f"Retrieved exchange rate: {result['exchange_rate']} (date: {result['date']})")
-            return float(result['exchange_rate'])
+            exchange_rate, rate_date = result
+            logger.info(f"Retrieved exchange rate: {exchange_rate} (date: {rate_date})")
+            return float(exchange_rate)
         else:
             logger.warning("No exchange rate found in staging table")
             return None
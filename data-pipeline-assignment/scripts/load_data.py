@@ -3,209 +3,268 @@ Load transformed product data into PostgreSQL
 Supports both replace and upsert strategies
 """
 import logging
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple, Union
 import psycopg2
-from psycopg2.extras import execute_values
+import pyarrow as pa
+import pyarrow.parquet as pq
+from bulk import BulkWriter
+from db import get_conn
+from transform_data import PRODUCT_SCHEMA
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# products table columns, in PRODUCT_SCHEMA (and Product field) order
+PRODUCT_COLUMNS = tuple(PRODUCT_SCHEMA.names)
 
-def load_products_replace(products: List[Dict], db_config: Dict) -> bool:
+RAW_PRODUCT_COLUMNS = ('title', 'price_gbp', 'category', 'availability')
+
+# Rows of an Arrow table converted to Python objects at a time while loading
+COPY_BATCH_SIZE = 10_000
+
+
+def _product_rows(products: Union[List[Dict], pa.Table]) -> Iterator[Tuple]:
     """
-    Load products using REPLACE strategy (truncate and insert)
+    Iterate products as tuples in PRODUCT_COLUMNS order
+    
+    Arrow tables are converted COPY_BATCH_SIZE rows at a time, column by
+    column and zipped, so only one batch of Python values exists at once
+    and no dict lookup is needed per field.
     
     Args:
-        products: List of transformed product dictionaries
+        products: Products (dicts or Product records) or an Arrow table
+        
+    Yields:
+        Row tuples
+    """
+    if isinstance(products, pa.Table):
+        for batch in products.select(PRODUCT_COLUMNS).to_batches(max_chunksize=COPY_BATCH_SIZE):
+            yield from zip(*(column.to_pylist() for column in batch.columns))
+    else:
+        for p in products:
+            yield tuple(p[col] for col in PRODUCT_COLUMNS)
+
+
+def load_products_replace(products: Union[List[Dict], pa.Table], db_config: Optional[Dict] = None, conn=None) -> bool:
+    """
+    Load products using REPLACE strategy (truncate and binary COPY)
+    
+    TRUNCATE and COPY run in the same transaction, so a failed load
+    leaves the previous contents in place.
+    
+    Args:
+        products: Transformed products (dicts or Product records) or an Arrow table
         db_config: Database connection configuration
+        conn: Optional existing connection to reuse instead of the pool
         
     Returns:
         True if successful, False otherwise
     """
     try:
-        conn = psycopg2.connect(**db_config)
-        cursor = conn.cursor()
-        
-        # Truncate the products table
-        logger.info("Truncating products table...")
-        cursor.execute("TRUNCATE TABLE products")
-        
-        # Prepare data for bulk insert
-        insert_query = """
-            INSERT INTO products (
-                product_id, title, price_gbp, price_inr, category,
-                availability_status, stock_quantity, price_tier
-            )
-            VALUES %s
-        """
+        with get_conn(db_config, conn) as conn:
+            with BulkWriter(conn, 'products', PRODUCT_COLUMNS) as writer:
+                # Truncate the products table
+                logger.info("Truncating products table...")
+                writer.truncate()
+                
+                # Binary COPY skips server-side numeric/integer text parsing
+                for row in _product_rows(products):
+                    writer.add(row)
+            
+            conn.commit()
         
-        # Convert products to tuples
-        values = [
-            (
-                p['product_id'],
-                p['title'],
-                p['price_gbp'],
-                p['price_inr'],
-                p['category'],
-                p['availability_status'],
-                p['stock_quantity'],
-                p['price_tier']
-            )
-            for p in products
-        ]
-        
-        # Bulk insert
-        execute_values(cursor, insert_query, values)
-        
-        conn.commit()
         logger.info(f"Successfully loaded {len(products)} products (REPLACE mode)")
         
-        cursor.close()
-        conn.close()
-        
         return True
         
     except psycopg2.Error as e:
         logger.error(f"Database error: {e}")
-        if conn:
-            conn.rollback()
         return False
     except Exception as e:
         logger.error(f"Unexpected error loading products: {e}")
         return False
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 
-def load_products_upsert(products: List[Dict], db_config: Dict) -> bool:
+def load_products_upsert(products: List[Dict], db_config: Optional[Dict] = None, conn=None) -> bool:
     """
     Load products using UPSERT strategy (insert or update on conflict)
     
+    Rows are binary COPY'd into an unindexed temp staging table, then
+    merged into products with a single server-side INSERT ... ON CONFLICT.
+    
     Args:
-        products: List of transformed product dictionaries
+        products: Transformed products (dicts or Product records)
         db_config: Database connection configuration
+        conn: Optional existing connection to reuse instead of the pool
         
     Returns:
         True if successful, False otherwise
     """
     try:
-        conn = psycopg2.connect(**db_config)
-        cursor = conn.cursor()
-        
-        upsert_query = """
-            INSERT INTO products (
-                product_id, title, price_gbp, price_inr, category,
-                availability_status, stock_quantity, price_tier
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (product_id)
-            DO UPDATE SET
-                title = EXCLUDED.title,
-                price_gbp = EXCLUDED.price_gbp,
-                price_inr = EXCLUDED.price_inr,
-                category = EXCLUDED.category,
-                availability_status = EXCLUDED.availability_status,
-                stock_quantity = EXCLUDED.stock_quantity,
-                price_tier = EXCLUDED.price_tier,
-                updated_at = CURRENT_TIMESTAMP
-        """
+        with get_conn(db_config, conn) as conn, conn.cursor() as cursor:
+            columns = ', '.join(PRODUCT_COLUMNS)
+            
+            # Staging table is dropped automatically at commit
+            cursor.execute("""
+                CREATE TEMP TABLE products_stage
+                (LIKE products INCLUDING DEFAULTS)
+                ON COMMIT DROP
+            """)
+            
+            # ON CONFLICT cannot touch the same row twice in one statement,
+            # so keep only the last occurrence of each product_id
+            unique_products = {p['product_id']: p for p in products}.values()
+            
+            with BulkWriter(conn, 'products_stage', PRODUCT_COLUMNS) as writer:
+                for row in _product_rows(unique_products):
+                    writer.add(row)
+            
+            upsert_query = f"""
+                INSERT INTO products ({columns})
+                SELECT {columns} FROM products_stage
+                ON CONFLICT (product_id)
+                DO UPDATE SET
+                    title = EXCLUDED.title,
+                    price_gbp = EXCLUDED.price_gbp,
+                    price_inr = EXCLUDED.price_inr,
+                    category = EXCLUDED.category,
+                    availability_status = EXCLUDED.availability_status,
+                    stock_quantity = EXCLUDED.stock_quantity,
+                    price_tier = EXCLUDED.price_tier,
+                    updated_at = CURRENT_TIMESTAMP
+            """
+            cursor.execute(upsert_query)
+            
+            conn.commit()
         
-        # Execute upsert for each product
-        for product in products:
-            cursor.execute(upsert_query, (
-                product['product_id'],
-                product['title'],
-                product['price_gbp'],
-                product['price_inr'],
-                product['category'],
-                product['availability_status'],
-                product['stock_quantity'],
-                product['price_tier']
-            ))
-        
-        conn.commit()
         logger.info(f"Successfully upserted {len(products)} products")
         
-        cursor.close()
-        conn.close()
-        
         return True
         
     except psycopg2.Error as e:
         logger.error(f"Database error: {e}")
-        if conn:
-            conn.rollback()
         return False
     except Exception as e:
         logger.error(f"Unexpected error upserting products: {e}")
         return False
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 
-def load_raw_products(products: List[Dict], db_config: Dict) -> bool:
+def load_raw_products(products: List[Dict], db_config: Optional[Dict] = None, conn=None) -> bool:
     """
     Load raw (untransformed) products to raw_products table
-    Optional intermediate step for debugging
+    This table is the hand-off between the scrape and transform tasks
     
     Args:
         products: List of raw product dictionaries
         db_config: Database connection configuration
+        conn: Optional existing connection to reuse instead of the pool
         
     Returns:
         True if successful, False otherwise
     """
     try:
-        conn = psycopg2.connect(**db_config)
-        cursor = conn.cursor()
-        
-        # Truncate raw_products table
-        cursor.execute("TRUNCATE TABLE raw_products")
-        
-        insert_query = """
-            INSERT INTO raw_products (title, price_gbp, category, availability)
-            VALUES %s
-        """
-        
-        values = [
-            (
-                p.get('title'),
-                p.get('price_gbp'),
-                p.get('category'),
-                p.get('availability')
-            )
-            for p in products
-        ]
+        with get_conn(db_config, conn) as conn:
+            with BulkWriter(conn, 'raw_products', RAW_PRODUCT_COLUMNS) as writer:
+                # Truncate raw_products table
+                writer.truncate()
+                
+                for p in products:
+                    writer.add(p)
+            
+            conn.commit()
         
-        execute_values(cursor, insert_query, values)
-        
-        conn.commit()
         logger.info(f"Successfully loaded {len(products)} raw products")
         
-        cursor.close()
-        conn.close()
-        
         return True
         
     except psycopg2.Error as e:
         logger.error(f"Database error: {e}")
-        if conn:
-            conn.rollback()
         return False
     except Exception as e:
         logger.error(f"Unexpected error loading raw products: {e}")
         return False
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+
+
+def get_raw_products(db_config: Optional[Dict] = None, conn=None) -> Optional[List[Dict]]:
+    """
+    Read back the raw products stored by load_raw_products
+    
+    Args:
+        db_config: Database connection configuration
+        conn: Optional existing connection to reuse instead of the pool
+        
+    Returns:
+        List of raw product dictionaries in scrape order, or None if failed
+    """
+    try:
+        query = """
+            SELECT title, price_gbp, category, availability
+            FROM raw_products
+            ORDER BY id
+        """
+        
+        with get_conn(db_config, conn) as conn, conn.cursor() as cursor:
+            cursor.execute(query)
+            rows = cursor.fetchall()
+        
+        products = [
+            {
+                'title': title,
+                'price_gbp': float(price_gbp) if price_gbp is not None else None,
+                'category': category,
+                'availability': availability
+            }
+            for title, price_gbp, category, availability in rows
+        ]
+        
+        logger.info(f"Retrieved {len(products)} raw products")
+        
+        return products
+        
+    except psycopg2.Error as e:
+        logger.error(f"Database error: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"Unexpected error retrieving raw products: {e}")
+        return None
+
+
+def write_tables_parquet(tables: Iterable[pa.Table], path: str) -> int:
+    """
+    Write Arrow tables of transformed products to a parquet file for the load task
+    
+    Each table becomes one or more row groups, so an iterator of batches
+    is never held in memory in full.
+    
+    Args:
+        tables: Iterable of tables with PRODUCT_SCHEMA columns
+        path: Destination file path
+        
+    Returns:
+        Number of rows written
+    """
+    rows = 0
+    
+    with pq.ParquetWriter(path, PRODUCT_SCHEMA) as writer:
+        for table in tables:
+            writer.write_table(table)
+            rows += table.num_rows
+    
+    logger.info(f"Wrote {rows} products to {path}")
+    return rows
+
+
+def read_products_parquet(path: str) -> pa.Table:
+    """
+    Read transformed products written by write_tables_parquet
+    
+    Args:
+        path: Parquet file path
+        
+    Returns:
+        Arrow table with PRODUCT_SCHEMA columns
+    """
+    return pq.read_table(path, schema=PRODUCT_SCHEMA)
 
 
 if __name__ == "__main__":
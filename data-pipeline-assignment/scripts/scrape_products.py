@@ -2,20 +2,116 @@
 Web scraper for books.toscrape.com
 Extracts product title, price (GBP), category, and availability
 """
+import asyncio
 import logging
 import re
-from typing import List, Dict
-import requests
-from bs4 import BeautifulSoup
+from typing import List, Dict, Optional
+import aiohttp
+from lxml import etree, html
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Maximum number of concurrent (keep-alive) HTTP connections
+MAX_CONNECTIONS = 32
 
-def scrape_books(base_url: str = "https://books.toscrape.com", max_pages: int = 5) -> List[Dict]:
+# Request timeout in seconds
+REQUEST_TIMEOUT = 10
+
+# Detail pages are requested only up to this many bytes; the breadcrumb
+# sits near the top of the page, so the rest is never needed
+CATEGORY_RANGE_BYTES = 8 * 1024
+_CATEGORY_HEADERS = {'Range': f"bytes=0-{CATEGORY_RANGE_BYTES - 1}"}
+
+# Bytes fed to the incremental breadcrumb parser at a time
+_PARSE_BLOCK_SIZE = 1024
+
+# books.toscrape.com serves UTF-8 without always declaring it
+_HTML_PARSER = html.HTMLParser(encoding='utf-8')
+
+# Strips the currency symbol and any other non-numeric price characters
+_PRICE_STRIP = re.compile(r'[^\d.]')
+
+# Precompiled XPath selectors, evaluated in C by libxml2
+_PRODUCT_XP = etree.XPath('//article[contains(concat(" ", normalize-space(@class), " "), " product_pod ")]')
+_TITLE_XP = etree.XPath('string(.//h3/a/@title)')
+_HREF_XP = etree.XPath('string(.//h3/a/@href)')
+_PRICE_XP = etree.XPath('string(.//p[contains(concat(" ", normalize-space(@class), " "), " price_color ")])')
+_AVAILABILITY_XP = etree.XPath('.//p[@class="instock availability"]')
+_BREADCRUMB_LINK_XP = etree.XPath('.//a')
+
+
+async def _fetch_page(session: aiohttp.ClientSession, url: str) -> Optional[bytes]:
+    """
+    Fetch the raw HTML of a page
+    
+    Args:
+        session: Shared aiohttp session
+        url: Full URL of the page
+        
+    Returns:
+        Page content, or None if the request failed
+    """
+    try:
+        async with session.get(url) as response:
+            response.raise_for_status()
+            return await response.read()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Error fetching page {url}: {e}")
+        return None
+
+
+def parse_product_card(product, base_url: str) -> Optional[Dict]:
+    """
+    Extract listing-level fields from a single product card
+    
+    Args:
+        product: lxml element for an article.product_pod
+        base_url: Base URL of the website
+        
+    Returns:
+        Dictionary with title, price, availability and detail URL, or None
+    """
+    try:
+        # Extract title
+        title = _TITLE_XP(product).strip()
+        
+        # Extract price (remove £ symbol)
+        price_text = _PRICE_XP(product).strip()
+        price_gbp = float(_PRICE_STRIP.sub('', price_text))
+        
+        # Extract availability
+        availability_elements = _AVAILABILITY_XP(product)
+        availability = availability_elements[0].text_content().strip() if availability_elements else 'Unknown'
+        
+        # Get product detail URL to fetch category. Listing hrefs are only
+        # "<book-slug>_<id>/index.html"; the category appears nowhere on the
+        # listing page, so it has to come from the detail page breadcrumb
+        product_url = _HREF_XP(product)
+        if not product_url:
+            raise ValueError("product link not found")
+        full_product_url = f"{base_url}/catalogue/{product_url.replace('../', '')}"
+        
+        return {
+            'title': title,
+            'price_gbp': price_gbp,
+            'availability': availability,
+            'detail_url': full_product_url
+        }
+        
+    except Exception as e:
+        logger.error(f"Error extracting product data: {e}")
+        return None
+
+
+async def scrape_books_async(base_url: str = "https://books.toscrape.com", max_pages: int = 5) -> List[Dict]:
     """
     Scrape product data from books.toscrape.com
     
+    All listing pages are requested at once, then every distinct product
+    detail page is requested at once for its category, over a single
+    keep-alive connection pool.
+    
     Args:
         base_url: Base URL of the website
         max_pages: Maximum number of pages to scrape
@@ -23,101 +119,174 @@ def scrape_books(base_url: str = "https://books.toscrape.com", max_pages: int =
     Returns:
         List of dictionaries containing product data
     """
-    products = []
+    page_urls = [
+        f"{base_url}/catalogue/page-{page_num}.html"
+        for page_num in range(1, max_pages + 1)
+    ]
     
-    for page_num in range(1, max_pages + 1):
-        try:
-            # Construct page URL
-            if page_num == 1:
-                url = f"{base_url}/catalogue/page-{page_num}.html"
-            else:
-                url = f"{base_url}/catalogue/page-{page_num}.html"
-            
-            logger.info(f"Scraping page {page_num}: {url}")
-            
-            # Fetch page content
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find all product containers
-            product_containers = soup.find_all('article', class_='product_pod')
-            
-            if not product_containers:
-                logger.warning(f"No products found on page {page_num}")
+    # Limits apply per socket operation, like requests' timeout. A total
+    # limit would also count time spent queued for a pooled connection,
+    # timing out requests behind the first MAX_CONNECTIONS unsent
+    connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS)
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=REQUEST_TIMEOUT, sock_read=REQUEST_TIMEOUT)
+    
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        logger.info(f"Scraping {len(page_urls)} pages from {base_url}")
+        pages = await asyncio.gather(*[_fetch_page(session, url) for url in page_urls])
+        
+        cards = []
+        for page_num, content in enumerate(pages, start=1):
+            # Stop at the first page that failed, same as a serial crawl
+            if content is None:
                 break
             
-            for product in product_containers:
-                try:
-                    # Extract title
-                    title_element = product.find('h3').find('a')
-                    title = title_element.get('title', '').strip()
-                    
-                    # Extract price (remove £ symbol)
-                    price_element = product.find('p', class_='price_color')
-                    price_text = price_element.text.strip()
-                    price_gbp = float(re.sub(r'[^\d.]', '', price_text))
-                    
-                    # Extract availability
-                    availability_element = product.find('p', class_='instock availability')
-                    availability = availability_element.text.strip() if availability_element else 'Unknown'
-                    
-                    # Get product detail URL to fetch category
-                    product_url = product.find('h3').find('a')['href']
-                    full_product_url = f"{base_url}/catalogue/{product_url.replace('../', '')}"
-                    
-                    # Fetch product detail page for category
-                    category = fetch_product_category(full_product_url)
-                    
-                    products.append({
-                        'title': title,
-                        'price_gbp': price_gbp,
-                        'category': category,
-                        'availability': availability
-                    })
-                    
-                except Exception as e:
-                    logger.error(f"Error extracting product data: {e}")
-                    continue
-            
-            logger.info(f"Scraped {len(product_containers)} products from page {page_num}")
-            
-        except requests.RequestException as e:
-            logger.error(f"Error fetching page {page_num}: {e}")
-            break
-        except Exception as e:
-            logger.error(f"Unexpected error on page {page_num}: {e}")
-            break
+            try:
+                document = html.fromstring(content, parser=_HTML_PARSER)
+                
+                # Find all product containers
+                product_containers = _PRODUCT_XP(document)
+                
+                if not product_containers:
+                    logger.warning(f"No products found on page {page_num}")
+                    break
+                
+                for product in product_containers:
+                    card = parse_product_card(product, base_url)
+                    if card:
+                        cards.append(card)
+                
+                logger.info(f"Scraped {len(product_containers)} products from page {page_num}")
+                
+            except Exception as e:
+                logger.error(f"Unexpected error on page {page_num}: {e}")
+                break
+        
+        # Fetch each distinct product detail page once for its category
+        detail_urls = list(dict.fromkeys(card['detail_url'] for card in cards))
+        categories = dict(zip(
+            detail_urls,
+            await asyncio.gather(*[
+                fetch_product_category_async(session, url) for url in detail_urls
+            ])
+        ))
+    
+    products = [
+        {
+            'title': card['title'],
+            'price_gbp': card['price_gbp'],
+            'category': categories[card['detail_url']],
+            'availability': card['availability']
+        }
+        for card in cards
+    ]
     
     logger.info(f"Total products scraped: {len(products)}")
     return products
 
 
-def fetch_product_category(product_url: str) -> str:
+def scrape_books(base_url: str = "https://books.toscrape.com", max_pages: int = 5) -> List[Dict]:
+    """
+    Synchronous entry point for scrape_books_async
+    
+    Args:
+        base_url: Base URL of the website
+        max_pages: Maximum number of pages to scrape
+        
+    Returns:
+        List of dictionaries containing product data
+    """
+    return asyncio.run(scrape_books_async(base_url=base_url, max_pages=max_pages))
+
+
+def _breadcrumb_category(events) -> Optional[str]:
+    """
+    Pick the category out of parser events for closed <ul> elements
+    
+    Args:
+        events: (event, element) pairs from an HTMLPullParser
+        
+    Returns:
+        Category name, 'Unknown' if the breadcrumb has no category,
+        or None if no breadcrumb was among the events
+    """
+    for _, element in events:
+        if 'breadcrumb' in (element.get('class') or '').split():
+            # Category is the third link (Home > Books > Category)
+            category_links = _BREADCRUMB_LINK_XP(element)
+            if len(category_links) >= 3:
+                return ''.join(category_links[2].itertext()).strip()
+            return 'Unknown'
+    return None
+
+
+def _find_category(content: bytes, complete: bool = True) -> Optional[str]:
+    """
+    Incrementally parse a detail page only as far as its breadcrumb
+    
+    Args:
+        content: Raw HTML of the detail page, possibly only its first bytes
+        complete: Whether content is the whole page
+        
+    Returns:
+        Category name, 'Unknown' if the page has no category, or None if
+        content is partial and ends before the breadcrumb does
+    """
+    parser = etree.HTMLPullParser(events=('end',), tag='ul', encoding='utf-8')
+    
+    for start in range(0, len(content), _PARSE_BLOCK_SIZE):
+        parser.feed(content[start:start + _PARSE_BLOCK_SIZE])
+        category = _breadcrumb_category(parser.read_events())
+        if category is not None:
+            return category
+    
+    # A truncated page may simply have been cut off before the breadcrumb
+    if not complete:
+        return None
+    
+    parser.close()
+    return _breadcrumb_category(parser.read_events()) or 'Unknown'
+
+
+def parse_category(content: bytes) -> str:
+    """
+    Extract the category from a product detail page
+    
+    Args:
+        content: Raw HTML of the detail page
+        
+    Returns:
+        Category name or 'Unknown' if the page has no category
+    """
+    return _find_category(content)
+
+
+async def fetch_product_category_async(session: aiohttp.ClientSession, product_url: str) -> str:
     """
     Fetch the category of a product from its detail page
     
     Args:
+        session: Shared aiohttp session
         product_url: Full URL to the product detail page
         
     Returns:
         Category name or 'Unknown'
     """
     try:
-        response = requests.get(product_url, timeout=10)
-        response.raise_for_status()
+        # Only the head of the page is needed; servers that ignore Range
+        # answer 200 with the full page, which parses the same way
+        async with session.get(product_url, headers=_CATEGORY_HEADERS) as response:
+            response.raise_for_status()
+            content = await response.read()
+            partial = response.status == 206
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        category = _find_category(content, complete=not partial)
+        if category is None:
+            async with session.get(product_url) as response:
+                response.raise_for_status()
+                content = await response.read()
+            category = parse_category(content)
         
-        # Category is in breadcrumb
-        breadcrumb = soup.find('ul', class_='breadcrumb')
-        if breadcrumb:
-            category_links = breadcrumb.find_all('a')
-            if len(category_links) >= 3:
-                return category_links[2].text.strip()
-        
-        return 'Unknown'
+        return category
         
     except Exception as e:
         logger.warning(f"Could not fetch category from {product_url}: {e}")
@@ -6,15 +6,114 @@ Transform raw product data:
 - Convert GBP to INR
 - Derive price tiers
 - Generate stable product IDs
+
+The DAG streams iter_transform_tables. transform_products (with its
+process pool) and transform_products_table are library API for callers
+that transform records in memory.
 """
 import logging
 import hashlib
+import os
 import re
-from typing import List, Dict, Optional
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from itertools import compress, islice
+from typing import Any, Callable, List, Dict, Hashable, Iterable, Iterator, Optional, Set, Tuple
+import numpy as np
+import pandas as pd
+import pyarrow as pa
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Raw product fields read by the transform. The scraper and
+# get_raw_products emit title, category and availability as str and
+# price_gbp as float (None when missing); the batch path converts that
+# column to float64 once, and other types go through the per-row path.
+RAW_FIELDS = ('title', 'price_gbp', 'category', 'availability')
+
+# Products transformed per batch by iter_transform_tables
+TRANSFORM_BATCH_SIZE = 10_000
+
+# Batches smaller than this are transformed row by row; building the
+# DataFrame costs ~5 ms per call, more than a small batch takes per row
+VECTORIZE_THRESHOLD = 1_000
+
+# Batches smaller than this are not worth a process pool
+PARALLEL_THRESHOLD = 50_000
+
+# Smallest chunk handed to a single worker process
+PARALLEL_MIN_CHUNK = 10_000
+
+# Share of a batch that must repeat a title before the batch is
+# deduplicated; below this, keying every row costs more than it saves
+DEDUPE_MIN_REPEATS = 0.2
+
+# Price tier boundaries in GBP: below 20 is cheap, below 50 moderate
+_TIER_BOUNDS = np.array([20.0, 50.0])
+_TIER_NAMES = np.array(['cheap', 'moderate', 'expensive'])
+
+# Precompiled patterns shared by the per-row and vectorized paths
+_WS_RE = re.compile(r'\s+')
+_QTY_RE = re.compile(r'\((\d+)\s+available\)')
+
+
+@dataclass(slots=True)
+class Product:
+    """
+    Transformed product record
+    
+    Fields are in products table column order. Uses a fraction of the
+    memory of the equivalent dict and is cheaper to construct.
+    """
+    product_id: str
+    title: str
+    price_gbp: float
+    price_inr: float
+    category: str
+    availability_status: str
+    stock_quantity: Optional[int]
+    price_tier: str
+    
+    def __getitem__(self, field: str):
+        """Mapping-style access (product['title']) for dict-based callers"""
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            raise KeyError(field) from None
+
+
+# Columnar layout of Product, used for Arrow tables and the parquet hand-off
+PRODUCT_SCHEMA = pa.schema([
+    ('product_id', pa.string()),
+    ('title', pa.string()),
+    ('price_gbp', pa.float64()),
+    ('price_inr', pa.float64()),
+    ('category', pa.string()),
+    ('availability_status', pa.string()),
+    ('stock_quantity', pa.int32()),
+    ('price_tier', pa.string())
+])
+
+
+def _is_utf8(text: str) -> bool:
+    """
+    Check that text can be encoded as UTF-8, i.e. has no lone surrogates
+    
+    Args:
+        text: Input text
+        
+    Returns:
+        True if text.encode('utf-8') succeeds
+    """
+    if text.isascii():
+        return True
+    try:
+        text.encode('utf-8')
+    except UnicodeEncodeError:
+        return False
+    return True
+
 
 def clean_text(text: str) -> str:
     """
@@ -29,18 +128,28 @@ def clean_text(text: str) -> str:
     if not text:
         return ""
     
+    # Fast path: with no whitespace runs and no whitespace other than
+    # single ASCII spaces (the only printable whitespace), the regex
+    # would not change anything
+    if '  ' not in text and text.isprintable():
+        return text.strip()
+    
     # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
+    text = _WS_RE.sub(' ', text)
     # Trim
     text = text.strip()
     
     return text
 
 
+@lru_cache(maxsize=4096)
 def normalize_category(category: str) -> str:
     """
     Normalize category names
     
+    Catalogs have only a few dozen distinct categories, so results are
+    cached and repeat values cost a dict lookup.
+    
     Args:
         category: Raw category text
         
@@ -57,10 +166,35 @@ def normalize_category(category: str) -> str:
     return category
 
 
+def _stock_status(availability: str) -> str:
+    """
+    Classify cleaned availability text
+    
+    Matches on str.lower() rather than a re.IGNORECASE pattern, whose
+    case folding would also match text like 'İn stock' or 'in ſtock'.
+    
+    Args:
+        availability: Cleaned availability text
+        
+    Returns:
+        'In Stock', 'Out of Stock', or 'Unknown'
+    """
+    availability = availability.lower()
+    if 'in stock' in availability:
+        return 'In Stock'
+    if 'out of stock' in availability:
+        return 'Out of Stock'
+    return 'Unknown'
+
+
+@lru_cache(maxsize=4096)
 def parse_availability(availability: str) -> tuple:
     """
     Parse availability text to extract status and quantity
     
+    Cached like normalize_category, as the same availability strings
+    recur across many products.
+    
     Args:
         availability: Raw availability text (e.g., "In stock (22 available)")
         
@@ -73,16 +207,11 @@ def parse_availability(availability: str) -> tuple:
     availability = clean_text(availability)
     
     # Extract quantity if present
-    quantity_match = re.search(r'\((\d+)\s+available\)', availability)
+    quantity_match = _QTY_RE.search(availability)
     quantity = int(quantity_match.group(1)) if quantity_match else None
     
     # Determine status
-    if 'in stock' in availability.lower():
-        status = 'In Stock'
-    elif 'out of stock' in availability.lower():
-        status = 'Out of Stock'
-    else:
-        status = 'Unknown'
+    status = _stock_status(availability)
     
     return (status, quantity)
 
@@ -123,7 +252,7 @@ def derive_price_tier(price_gbp: float) -> str:
         return 'expensive'
 
 
-def generate_product_id(title: str, category: str, price_gbp: float) -> str:
+def generate_product_id(title: str, category: str, price_gbp: float, cryptographic_id: bool = True) -> str:
     """
     Generate stable product ID by hashing title, category, and price
     
@@ -131,93 +260,563 @@ def generate_product_id(title: str, category: str, price_gbp: float) -> str:
         title: Product title
         category: Product category
         price_gbp: Price in GBP
+        cryptographic_id: Hash with SHA256 (the existing ID format); if
+            False, use the much faster non-cryptographic XXH3-128
         
     Returns:
-        SHA256 hash as product ID
+        Hex digest as product ID (64 chars for SHA256, 32 for XXH3-128)
     """
-    # Create a unique string from title, category, and price
-    unique_string = f"{title}|{category}|{price_gbp}"
+    # Create a unique key from title, category, and price; the bytes are
+    # the UTF-8 encoding of "title|category|price"
+    key = b'|'.join((title.encode('utf-8'), category.encode('utf-8'), str(price_gbp).encode('ascii')))
     
-    # Generate SHA256 hash
-    product_id = hashlib.sha256(unique_string.encode('utf-8')).hexdigest()
+    # Generate hash
+    if cryptographic_id:
+        product_id = hashlib.sha256(key).hexdigest()
+    else:
+        # Imported on first use; only needed for the opt-in XXH3 IDs
+        import xxhash
+        product_id = xxhash.xxh3_128_hexdigest(key)
     
     return product_id
 
 
-def transform_product(product: Dict, exchange_rate: float) -> Dict:
+def generate_product_ids(
+    titles: List[str],
+    categories: List[str],
+    prices: List[float],
+    cryptographic_id: bool = True
+) -> List[str]:
+    """
+    Batch form of generate_product_id
+    
+    Hashes in a single comprehension with the constructor bound locally,
+    instead of one Python-level call per product. Each distinct category
+    is encoded only once.
+    
+    Args:
+        titles: Product titles
+        categories: Product categories
+        prices: Prices in GBP
+        cryptographic_id: Hash with SHA256 rather than XXH3-128
+        
+    Returns:
+        Product IDs, same values as generate_product_id
+    """
+    separated = {category: b'|' + category.encode('utf-8') + b'|' for category in set(categories)}
+    keys = (
+        title.encode('utf-8') + separated[category] + str(price_gbp).encode('ascii')
+        for title, category, price_gbp in zip(titles, categories, prices)
+    )
+    
+    if cryptographic_id:
+        sha256 = hashlib.sha256
+        return [sha256(key).hexdigest() for key in keys]
+    
+    import xxhash
+    return list(map(xxhash.xxh3_128_hexdigest, keys))
+
+
+def transform_product(product: Dict, exchange_rate: float, cryptographic_id: bool = True) -> Optional[Product]:
     """
     Transform a single product with all cleaning and enrichment steps
     
     Args:
         product: Raw product dictionary
         exchange_rate: GBP to INR exchange rate
+        cryptographic_id: Generate SHA256 rather than XXH3-128 product IDs
         
     Returns:
-        Transformed product dictionary
+        Transformed Product, or None if a field has the wrong type, the
+        title or category is not valid Unicode text, or the price does
+        not parse
     """
+    if not isinstance(product, dict):
+        return None
+    
+    # Empty text fields fall back to defaults; any other non-string is malformed
+    title = product.get('title') or ''
+    category = product.get('category') or ''
+    availability = product.get('availability') or ''
+    if not (isinstance(title, str) and isinstance(category, str) and isinstance(availability, str)):
+        return None
+    
+    # Both are hashed into the product ID as UTF-8
+    if not (_is_utf8(title) and _is_utf8(category)):
+        return None
+    
     try:
-        # Clean text fields
-        title = clean_text(product.get('title', ''))
-        
-        # Normalize category
-        category = normalize_category(product.get('category', ''))
+        price_gbp = float(product.get('price_gbp', 0))
+    except (TypeError, ValueError, OverflowError):
+        return None
+    
+    # Clean text fields
+    title = clean_text(title)
+    category = normalize_category(category)
+    
+    # Parse availability
+    status, quantity = parse_availability(availability)
+    
+    # Convert price and derive tier
+    price_inr = convert_price_to_inr(price_gbp, exchange_rate)
+    price_tier = derive_price_tier(price_gbp)
+    
+    # Generate product ID
+    product_id = generate_product_id(title, category, price_gbp, cryptographic_id)
+    
+    return Product(product_id, title, price_gbp, price_inr, category, status, quantity, price_tier)
+
+
+def _text_column(values: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+    """
+    Prepare a raw text column for the vectorized string operations
+    
+    Args:
+        values: Raw column from the products DataFrame
         
-        # Parse availability
-        availability = product.get('availability', '')
-        status, quantity = parse_availability(availability)
+    Returns:
+        Tuple of (column with non-strings and non-UTF-8 strings replaced
+        by '', mask of rows whose value is None or a UTF-8 encodable
+        string and can be handled column-wise)
+    """
+    types = values.map(type)
+    is_text = types.eq(str)
+    is_text &= values.where(is_text, '').map(_is_utf8)
+    text = values.where(is_text, '')
+    return text, (is_text | types.eq(type(None))).to_numpy()
+
+
+def _clean_column(text: pd.Series) -> pd.Series:
+    """
+    Column-wise equivalent of clean_text
+    
+    Mapping clean_text lets already-clean values skip the regex, which
+    is faster than running .str.replace and .str.strip over every row.
+    
+    Args:
+        text: Series of strings
         
-        # Get price
-        price_gbp = float(product.get('price_gbp', 0))
+    Returns:
+        Series with whitespace runs collapsed and ends trimmed
+    """
+    return text.map(clean_text)
+
+
+def _map_unique(text: pd.Series, func: Callable[[str], Any]) -> pd.Series:
+    """
+    Apply func once per distinct value of a low-cardinality column
+    
+    Args:
+        text: Series of strings
+        func: Function to apply to each distinct value
         
-        # Convert to INR
-        price_inr = convert_price_to_inr(price_gbp, exchange_rate)
+    Returns:
+        Series of func results, aligned with text
+    """
+    uniques = text.unique().tolist()
+    return text.map(dict(zip(uniques, map(func, uniques))))
+
+
+def _round_cents(values: np.ndarray) -> List[float]:
+    """
+    Column-wise equivalent of round(value, 2)
+    
+    Rounds value * 100 to the nearest integer in NumPy. That only differs
+    from round() when the scaling error could carry a value across a
+    half-cent boundary, so those values (and very large or non-finite
+    ones) are re-rounded with round() individually.
+    
+    Args:
+        values: Array of float64 values
         
-        # Derive price tier
-        price_tier = derive_price_tier(price_gbp)
+    Returns:
+        List of rounded values, same as round(value, 2) for each
+    """
+    scaled = values * 100
+    cents = np.rint(scaled)
+    magnitude = np.abs(scaled)
+    
+    # A product is off by at most half an ulp, well below this bound;
+    # inf - inf is NaN here, and infinities are rechecked anyway
+    with np.errstate(invalid='ignore'):
+        near_half = np.abs(np.abs(scaled - cents) - 0.5) <= magnitude * 2.0 ** -50
+    recheck = near_half | ~(magnitude < 2.0 ** 52)
+    
+    rounded = (cents / 100).tolist()
+    for i in np.flatnonzero(recheck).tolist():
+        rounded[i] = round(values[i].item(), 2)
+    
+    return rounded
+
+
+def _raw_key(product: Dict) -> Hashable:
+    """
+    Key equal for raw products that transform identically
+    
+    Args:
+        product: Raw product dictionary
         
-        # Generate product ID
-        product_id = generate_product_id(title, category, price_gbp)
+    Returns:
+        Tuple of the fields read by the transform
+    """
+    price = product.get('price_gbp', 0)
+    
+    # Zero-like prices compare equal (0 == False == -0.0) but don't
+    # transform alike, so they are told apart by type and repr
+    if not price:
+        price = (type(price), repr(price))
+    
+    return (product.get('title'), product.get('category'), product.get('availability'), price)
+
+
+def _distinct_products(products: List[Dict]) -> Optional[Tuple[List[Dict], List[int]]]:
+    """
+    Find repeated raw products, e.g. a listing scraped from two pages
+    
+    Args:
+        products: List of raw product dictionaries
         
-        return {
-            'product_id': product_id,
-            'title': title,
-            'price_gbp': price_gbp,
-            'price_inr': price_inr,
-            'category': category,
-            'availability_status': status,
-            'stock_quantity': quantity,
-            'price_tier': price_tier
-        }
+    Returns:
+        Tuple of (one product per distinct key, index into that list for
+        each input product), or None if too few products repeat or a
+        field is unhashable
+    """
+    try:
+        # Distinct titles mean distinct products, so this bounds the repeats
+        repeats = len(products) - len({product.get('title') for product in products})
+        if repeats < len(products) * DEDUPE_MIN_REPEATS:
+            return None
         
-    except Exception as e:
-        logger.error(f"Error transforming product {product.get('title', 'Unknown')}: {e}")
+        keys = [_raw_key(product) for product in products]
+        distinct = dict(zip(keys, products))
+    except TypeError:
         return None
+    
+    if len(distinct) == len(products):
+        return None
+    
+    position = {key: i for i, key in enumerate(distinct)}
+    return list(distinct.values()), [position[key] for key in keys]
+
+
+def _transform_distinct(
+    products: List[Dict],
+    exchange_rate: float,
+    cryptographic_id: bool = True
+) -> Tuple[Dict[str, list], Set[int]]:
+    """
+    Transform a batch of products with vectorized pandas/NumPy operations
+    
+    Rows the column-wise path can't represent exactly (missing,
+    non-string, non-UTF-8 or non-numeric values) go through
+    transform_product instead, so results match it row for row.
+    
+    Args:
+        products: Non-empty list of raw product dictionaries
+        exchange_rate: GBP to INR exchange rate
+        cryptographic_id: Generate SHA256 rather than XXH3-128 product IDs
+        
+    Returns:
+        Tuple of (dict of transformed column lists keyed by
+        PRODUCT_SCHEMA field, positions of the malformed rows, whose
+        column values are placeholders)
+    """
+    try:
+        df = pd.DataFrame(products, columns=RAW_FIELDS)
+    except (OverflowError, UnicodeEncodeError):
+        # A price int too large for any numeric dtype, or text an Arrow
+        # string column can't hold; keep Python objects
+        df = pd.DataFrame(products, columns=RAW_FIELDS, dtype=object)
+    
+    # Prices; NaN marks rows that need float() on the per-row path. Only
+    # values that are exactly int or float are converted column-wise, so
+    # e.g. complex or datetime prices that pandas would cast to a numeric
+    # dtype go per row; object dtype makes the masked rows NaN
+    price_column = df['price_gbp'].astype(object)
+    price_types = price_column.map(type)
+    try:
+        prices = pd.to_numeric(
+            price_column.where(price_types.isin((int, float))), errors='coerce'
+        ).to_numpy(dtype=np.float64)
+    except OverflowError:
+        # Some int is beyond the float range, so leave all ints to
+        # float() per row, which rejects that one as malformed
+        prices = pd.to_numeric(
+            price_column.where(price_types.eq(float)), errors='coerce'
+        ).to_numpy(dtype=np.float64)
+    vectorized = ~np.isnan(prices)
+    
+    # Clean text fields
+    title_text, title_ok = _text_column(df['title'])
+    titles = _clean_column(title_text)
+    
+    # Normalize category
+    category_text, category_ok = _text_column(df['category'])
+    categories = _map_unique(category_text, normalize_category)
+    
+    # Parse availability
+    availability_text, availability_ok = _text_column(df['availability'])
+    statuses, quantities = zip(*_map_unique(availability_text, parse_availability).tolist())
+    
+    vectorized &= title_ok & category_ok & availability_ok
+    
+    # Convert to INR
+    if exchange_rate:
+        # Huge prices overflow to inf (as in the per-row path) or overflow
+        # when _round_cents scales by 100, which then rounds them per row
+        with np.errstate(over='ignore'):
+            price_inr = _round_cents(np.where(prices == 0, 0.0, prices * exchange_rate))
+    else:
+        price_inr = [0.0] * len(df)
+    
+    # Derive price tier; side='right' puts a price equal to a bound in the
+    # upper tier and NaN sorts last into 'expensive', as derive_price_tier
+    price_tiers = _TIER_NAMES[np.searchsorted(_TIER_BOUNDS, prices, side='right')].tolist()
+    
+    # Generate product IDs
+    titles = titles.tolist()
+    categories = categories.tolist()
+    prices = prices.tolist()
+    product_ids = generate_product_ids(titles, categories, prices, cryptographic_id)
+    
+    columns = {
+        'product_id': product_ids,
+        'title': titles,
+        'price_gbp': prices,
+        'price_inr': price_inr,
+        'category': categories,
+        'availability_status': list(statuses),
+        'stock_quantity': list(quantities),
+        'price_tier': price_tiers
+    }
+    
+    # Fill in the remaining rows one at a time, noting malformed ones
+    malformed = set()
+    for i in np.flatnonzero(~vectorized).tolist():
+        transformed_product = transform_product(products[i], exchange_rate, cryptographic_id)
+        if transformed_product is None:
+            malformed.add(i)
+            continue
+        for name, values in columns.items():
+            values[i] = getattr(transformed_product, name)
+    
+    return columns, malformed
+
+
+def _transform_columns(products: List[Dict], exchange_rate: float, cryptographic_id: bool = True) -> Dict[str, list]:
+    """
+    Transform a batch of products column-wise
+    
+    Repeated raw products are transformed once and the result copied to
+    each of their rows. Batches under VECTORIZE_THRESHOLD go through
+    transform_product row by row instead.
+    
+    Args:
+        products: List of raw product dictionaries
+        exchange_rate: GBP to INR exchange rate
+        cryptographic_id: Generate SHA256 rather than XXH3-128 product IDs
+        
+    Returns:
+        Dict of transformed column lists keyed by PRODUCT_SCHEMA field,
+        without the malformed rows
+    """
+    # Rows that aren't dicts are malformed, as in transform_product
+    products = [product for product in products if isinstance(product, dict)]
+    if not products:
+        return {name: [] for name in PRODUCT_SCHEMA.names}
+    
+    if len(products) < VECTORIZE_THRESHOLD:
+        transformed = [
+            product for product in (
+                transform_product(product, exchange_rate, cryptographic_id) for product in products
+            )
+            if product is not None
+        ]
+        return {name: [getattr(product, name) for product in transformed] for name in PRODUCT_SCHEMA.names}
+    
+    repeats = _distinct_products(products)
+    if repeats is None:
+        columns, malformed = _transform_distinct(products, exchange_rate, cryptographic_id)
+    else:
+        distinct, inverse = repeats
+        columns, malformed = _transform_distinct(distinct, exchange_rate, cryptographic_id)
+        columns = {name: [values[i] for i in inverse] for name, values in columns.items()}
+        malformed = {row for row, i in enumerate(inverse) if i in malformed} if malformed else set()
+    
+    if malformed:
+        keep = [i not in malformed for i in range(len(products))]
+        columns = {name: list(compress(values, keep)) for name, values in columns.items()}
+    
+    return columns
+
+
+def _transform_batch(products: List[Dict], exchange_rate: float, cryptographic_id: bool = True) -> List[Product]:
+    """
+    Transform a batch of products into Product records
+    
+    Args:
+        products: List of raw product dictionaries
+        exchange_rate: GBP to INR exchange rate
+        cryptographic_id: Generate SHA256 rather than XXH3-128 product IDs
+        
+    Returns:
+        List of transformed Products
+    """
+    return list(map(Product, *_transform_columns(products, exchange_rate, cryptographic_id).values()))
 
 
-def transform_products(products: List[Dict], exchange_rate: float) -> List[Dict]:
+def _log_summary(total: int, valid: int) -> None:
+    """
+    Log one line of transform counts, as a warning if any rows were skipped
+    
+    Args:
+        total: Raw products received
+        valid: Products transformed successfully
+    """
+    invalid = total - valid
+    logger.log(
+        logging.WARNING if invalid else logging.INFO,
+        "Transformed %d out of %d products, skipped %d malformed",
+        valid, total, invalid
+    )
+
+
+def transform_products(
+    products: List[Dict],
+    exchange_rate: float,
+    cryptographic_id: bool = True,
+    max_workers: Optional[int] = None
+) -> List[Product]:
     """
     Transform a list of products
     
+    Batches of at least PARALLEL_THRESHOLD products are split into one
+    chunk per worker and transformed in a process pool; smaller batches
+    run in-process, where pool startup and pickling would dominate.
+    
     Args:
         products: List of raw product dictionaries
         exchange_rate: GBP to INR exchange rate
+        cryptographic_id: Generate SHA256 rather than XXH3-128 product IDs
+        max_workers: Worker processes for large batches (default: CPU count)
         
     Returns:
-        List of transformed product dictionaries
+        List of transformed Products, in input order
     """
-    transformed = []
+    workers = min(max_workers or os.cpu_count() or 1, len(products) // PARALLEL_MIN_CHUNK or 1)
     
-    for product in products:
-        transformed_product = transform_product(product, exchange_rate)
-        if transformed_product:
-            transformed.append(transformed_product)
+    if len(products) < PARALLEL_THRESHOLD or workers < 2:
+        transformed = _transform_batch(products, exchange_rate, cryptographic_id)
+    else:
+        chunk_size = -(-len(products) // workers)
+        chunks = [products[i:i + chunk_size] for i in range(0, len(products), chunk_size)]
+        transform_chunk = partial(_transform_batch, exchange_rate=exchange_rate, cryptographic_id=cryptographic_id)
+        
+        # extend() sizes the list once per chunk rather than growing per item
+        transformed = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch in executor.map(transform_chunk, chunks):
+                transformed.extend(batch)
     
-    logger.info(f"Transformed {len(transformed)} out of {len(products)} products")
+    _log_summary(len(products), len(transformed))
     
     return transformed
 
 
+def _iter_columns(
+    products: Iterable[Dict],
+    exchange_rate: float,
+    cryptographic_id: bool,
+    batch_size: int
+) -> Iterator[Dict[str, list]]:
+    """
+    Transform products batch_size at a time, yielding the columns of each batch
+    
+    Args:
+        products: Iterable of raw product dictionaries
+        exchange_rate: GBP to INR exchange rate
+        cryptographic_id: Generate SHA256 rather than XXH3-128 product IDs
+        batch_size: Products per vectorized batch
+        
+    Yields:
+        Transformed column lists per batch, as from _transform_columns
+    """
+    products = iter(products)
+    total = 0
+    transformed = 0
+    
+    while True:
+        batch = list(islice(products, batch_size))
+        if not batch:
+            break
+        
+        columns = _transform_columns(batch, exchange_rate, cryptographic_id)
+        total += len(batch)
+        transformed += len(columns['product_id'])
+        yield columns
+    
+    _log_summary(total, transformed)
+
+
+def transform_products_table(
+    products: List[Dict],
+    exchange_rate: float,
+    cryptographic_id: bool = True
+) -> pa.Table:
+    """
+    Transform a list of products into an Arrow table
+    
+    The transformed columns go straight into Arrow without building a
+    Product per row, ready for parquet or the binary COPY loader.
+    
+    Args:
+        products: List of raw product dictionaries
+        exchange_rate: GBP to INR exchange rate
+        cryptographic_id: Generate SHA256 rather than XXH3-128 product IDs
+        
+    Returns:
+        Arrow table with PRODUCT_SCHEMA columns, in input order
+    """
+    table = pa.Table.from_pydict(
+        _transform_columns(products, exchange_rate, cryptographic_id),
+        schema=PRODUCT_SCHEMA
+    )
+    
+    _log_summary(len(products), table.num_rows)
+    
+    return table
+
+
+def iter_transform_tables(
+    products: Iterable[Dict],
+    exchange_rate: float,
+    cryptographic_id: bool = True,
+    batch_size: int = TRANSFORM_BATCH_SIZE
+) -> Iterator[pa.Table]:
+    """
+    Transform products lazily, one bounded batch at a time
+    
+    Only batch_size raw and transformed products are buffered at once,
+    so a consumer writing tables out as they arrive never holds the
+    whole transformed set in memory.
+    
+    Args:
+        products: Iterable of raw product dictionaries
+        exchange_rate: GBP to INR exchange rate
+        cryptographic_id: Generate SHA256 rather than XXH3-128 product IDs
+        batch_size: Products per vectorized batch
+        
+    Yields:
+        Arrow tables with PRODUCT_SCHEMA columns, one per non-empty batch
+    """
+    for columns in _iter_columns(products, exchange_rate, cryptographic_id, batch_size):
+        if columns['product_id']:
+            yield pa.Table.from_pydict(columns, schema=PRODUCT_SCHEMA)
+
+
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    
     # Test transformation
     sample_product = {
         'title': '  A Light in the Attic  ',
@@ -21,7 +21,7 @@ CREATE TABLE IF NOT EXISTS staging_exchange_rates (
     CONSTRAINT unique_rate_per_day UNIQUE (date, base_currency, target_currency)
 );
 
--- Create optional raw products table
+-- Create raw products table (scrape -> transform hand-off)
 CREATE TABLE IF NOT EXISTS raw_products (
     id SERIAL PRIMARY KEY,
     title TEXT,
@@ -0,0 +1,28 @@
+"""
+Shared pytest setup: make the pipeline modules in scripts/ importable
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+CATEGORIES = ('poetry', 'Science Fiction', '  travel ', '', 'Mystery')
+AVAILABILITY = ('In stock (22 available)', 'In stock', 'Out of stock', '', 'Pre-order')
+
+
+@pytest.fixture(scope='session')
+def raw_products():
+    """Factory for deterministic raw products covering every category and stock format"""
+    def make(count):
+        return [
+            {
+                'title': f'  Book   {i}  ',
+                'price_gbp': round(5 + (i * 7.31) % 90, 2),
+                'category': CATEGORIES[i % len(CATEGORIES)],
+                'availability': AVAILABILITY[i % len(AVAILABILITY)],
+            }
+            for i in range(count)
+        ]
+    return make
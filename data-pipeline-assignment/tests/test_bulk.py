@@ -0,0 +1,206 @@
+"""
+Tests for the binary COPY framing in scripts/bulk.py
+"""
+import io
+from collections import namedtuple
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Optional
+
+import pytest
+from pgcopy import CopyManager
+from pgcopy.copy import numeric
+
+import bulk
+from bulk import FLUSH_BYTES, BulkWriter, _CopyManager, _numeric
+
+COLUMNS = ('id', 'name')
+
+
+def _int4(value):
+    return ('i', [-1]) if value is None else ('ii', [4, value])
+
+
+def _text(value):
+    if value is None:
+        return ('i', [-1])
+    data = value.encode('utf-8')
+    return (f'i{len(data)}s', [len(data), data])
+
+
+class StubCopyManager(CopyManager):
+    """CopyManager with fixed formatters instead of ones looked up in the database"""
+
+    def compile(self):
+        self.formatters = [_int4, _text]
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def copy_expert(self, sql, file, size):
+        self.conn.copies.append((sql, file.read()))
+
+    def execute(self, sql):
+        self.conn.executed.append(sql)
+
+
+class FakeConn:
+    encoding = 'UTF8'
+
+    def __init__(self):
+        self.copies = []
+        self.executed = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+@dataclass
+class Record:
+    id: int
+    name: Optional[str]
+
+
+@pytest.fixture(autouse=True)
+def stub_formatters(monkeypatch):
+    monkeypatch.setattr(bulk, '_CopyManager', StubCopyManager)
+
+
+def pgcopy_stream(rows):
+    """The bytes pgcopy's own CopyManager would send for rows"""
+    stream = io.BytesIO()
+    StubCopyManager(None, 'public.items', COLUMNS).writestream(rows, stream)
+    return stream.getvalue()
+
+
+def test_add_matches_pgcopy_stream():
+    rows = [(1, 'one'), (2, None), (None, 'ünïcode\ttab'), (4, '')]
+    conn = FakeConn()
+
+    with BulkWriter(conn, 'public.items', COLUMNS) as writer:
+        writer.add(rows[0])
+        writer.add({'id': 2})
+        writer.add(Record(None, 'ünïcode\ttab'))
+        writer.add([4, ''])
+        assert conn.copies == []
+
+    assert conn.copies == [
+        ('COPY public.items (id, name) FROM STDIN WITH (FORMAT binary)', pgcopy_stream(rows))
+    ]
+    assert writer.rows_written == 4
+
+
+@pytest.mark.parametrize('row', [(1,), (1, 'one', 'extra'), ()])
+def test_add_rejects_rows_of_the_wrong_length(row):
+    writer = BulkWriter(FakeConn(), 'public.items', COLUMNS)
+
+    with pytest.raises(ValueError, match=f'{len(row)} values, expected 2'):
+        writer.add(row)
+
+
+def test_flush_and_truncate():
+    conn = FakeConn()
+    writer = BulkWriter(conn, 'public.items', COLUMNS)
+
+    # Nothing buffered: no COPY at all
+    writer.flush()
+    assert conn.copies == []
+
+    writer.add((1, 'dropped'))
+    writer.truncate()
+    writer.add((2, 'kept'))
+    writer.flush()
+
+    assert conn.executed == ['TRUNCATE TABLE public.items']
+    assert [data for _, data in conn.copies] == [pgcopy_stream([(2, 'kept')])]
+    assert writer.rows_written == 1
+
+
+def test_add_flushes_at_flush_bytes():
+    conn = FakeConn()
+    name = 'x' * 1000
+    row_size = len(pgcopy_stream([(0, name)])) - len(pgcopy_stream([]))
+    header_size = len(pgcopy_stream([])) - 2
+
+    # First row count whose encoded size reaches FLUSH_BYTES
+    rows_per_copy = -(-(FLUSH_BYTES - header_size) // row_size)
+    rows = [(i, name) for i in range(rows_per_copy + 1)]
+
+    with BulkWriter(conn, 'public.items', COLUMNS) as writer:
+        for row in rows[:rows_per_copy - 1]:
+            writer.add(row)
+        assert conn.copies == []
+
+        writer.add(rows[rows_per_copy - 1])
+        assert len(conn.copies) == 1
+        assert writer.rows_written == rows_per_copy
+
+        writer.add(rows[rows_per_copy])
+
+    assert [data for _, data in conn.copies] == [
+        pgcopy_stream(rows[:rows_per_copy]),
+        pgcopy_stream(rows[rows_per_copy:]),
+    ]
+    assert writer.rows_written == rows_per_copy + 1
+
+
+def test_exception_discards_pending_rows():
+    conn = FakeConn()
+
+    with pytest.raises(RuntimeError):
+        with BulkWriter(conn, 'public.items', COLUMNS) as writer:
+            writer.add((1, 'one'))
+            raise RuntimeError('load failed')
+
+    assert conn.copies == []
+
+
+@pytest.mark.parametrize('value, decimal', [
+    (10.25, Decimal('10.25')),
+    (0.1 + 0.2, Decimal('0.30000000000000004')),
+    (-0.0, Decimal('-0.0')),
+    (12, Decimal(12)),
+    (Decimal('99.99'), Decimal('99.99')),
+])
+def test_numeric_accepts_floats_and_ints(value, decimal):
+    assert _numeric(value) == numeric(decimal)
+
+
+@pytest.mark.parametrize('value', [float('inf'), float('-inf'), Decimal('Infinity'), Decimal('-Infinity')])
+def test_numeric_rejects_infinite_values(value):
+    with pytest.raises(ValueError, match='infinite'):
+        _numeric(value)
+
+
+@pytest.mark.parametrize('value', [float('nan'), Decimal('NaN')])
+def test_numeric_loads_nan(value):
+    assert _numeric(value) == numeric(Decimal('NaN'))
+
+
+Attribute = namedtuple('Attribute', 'attname type_category type_name type_mod not_null typelem')
+
+
+def test_varchar_rejects_values_longer_than_the_column(monkeypatch):
+    # VARCHAR(5): PostgreSQL reports the length + 4 as type_mod
+    columns = {
+        'code': Attribute('code', 'S', 'varchar', 9, False, 0),
+        'note': Attribute('note', 'S', 'text', -1, False, 0),
+    }
+    monkeypatch.setattr(bulk.inspect, 'get_types', lambda conn, schema, table: columns)
+    code, note = _CopyManager(FakeConn(), 'public.items', ('code', 'note')).formatters
+
+    # The limit is in characters, not encoded bytes
+    assert code('ünïcd')[1] == (7, 'ünïcd'.encode('utf-8'))
+    assert code(None) == ('i', (-1,))
+    assert note('x' * 100)[1] == (100, b'x' * 100)
+
+    with pytest.raises(ValueError, match='code'):
+        code('abcdef')
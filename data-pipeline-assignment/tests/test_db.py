@@ -0,0 +1,106 @@
+"""
+Tests for the pooled connection helpers in scripts/db.py
+"""
+import pytest
+
+import db
+from db import close_pools, get_conn, get_pool
+
+DB_CONFIG = {'host': 'localhost', 'port': 5432, 'database': 'airflow', 'user': 'airflow', 'password': 'airflow'}
+
+
+class FakeConn:
+    def __init__(self):
+        self.closed = 0
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakePool:
+    def __init__(self, minconn=1, maxconn=4, dsn=None):
+        self.dsn = dsn
+        self.conn = FakeConn()
+        self.returned = []
+        self.closed_all = False
+
+    def getconn(self):
+        return self.conn
+
+    def putconn(self, conn, close=False):
+        self.returned.append((conn, close))
+
+    def closeall(self):
+        self.closed_all = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(db, 'get_pool', lambda db_config: pool)
+    return pool
+
+
+def test_pooled_connection_is_returned(pool):
+    with get_conn(DB_CONFIG) as conn:
+        assert conn is pool.conn
+
+    assert pool.returned == [(pool.conn, False)]
+    assert pool.conn.rollbacks == 0
+
+
+def test_exception_rolls_back_and_returns_connection(pool):
+    with pytest.raises(RuntimeError):
+        with get_conn(DB_CONFIG):
+            raise RuntimeError('query failed')
+
+    assert pool.conn.rollbacks == 1
+    assert pool.returned == [(pool.conn, False)]
+
+
+def test_closed_connection_is_discarded(pool):
+    with pytest.raises(RuntimeError):
+        with get_conn(DB_CONFIG) as conn:
+            conn.closed = 2
+            raise RuntimeError('server went away')
+
+    # No rollback on a dead connection; the pool is told to close it
+    assert pool.conn.rollbacks == 0
+    assert pool.returned == [(pool.conn, True)]
+
+
+def test_caller_connection_is_passed_through(pool):
+    own = FakeConn()
+
+    with get_conn(conn=own) as conn:
+        assert conn is own
+
+    with pytest.raises(RuntimeError):
+        with get_conn(DB_CONFIG, conn=own):
+            raise RuntimeError('query failed')
+
+    assert own.rollbacks == 1
+    assert pool.returned == []
+
+
+def test_config_or_connection_required():
+    with pytest.raises(ValueError):
+        with get_conn():
+            pass
+
+
+def test_one_pool_per_config(monkeypatch):
+    monkeypatch.setattr(db, 'ThreadedConnectionPool', FakePool)
+    monkeypatch.setattr(db, '_pools', {})
+
+    first = get_pool(DB_CONFIG)
+
+    assert get_pool(dict(reversed(list(DB_CONFIG.items())))) is first
+    assert get_pool({**DB_CONFIG, 'database': 'other'}) is not first
+    assert 'dbname=airflow' in first.dsn
+
+    close_pools()
+
+    assert first.closed_all
+    assert db._pools == {}
@@ -0,0 +1,150 @@
+"""
+Tests for the deferrable exchange rate trigger in scripts/deferrable.py
+"""
+import asyncio
+import json
+import socket
+
+import pytest
+
+pytest.importorskip('airflow')
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from airflow.exceptions import AirflowException
+
+import deferrable
+from deferrable import ExchangeRateTrigger, FetchExchangeRateOperator
+from fetch_exchange_rate import RETRY_TOTAL
+
+RATES = {'success': True, 'base': 'GBP', 'rates': {'INR': 105.5}}
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """Record backoff delays instead of sleeping through them"""
+    recorded = []
+    sleep = asyncio.sleep
+
+    async def no_wait(delay, *args, **kwargs):
+        # aiohttp itself yields with sleep(0); backoff delays are never zero
+        if delay:
+            recorded.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr(deferrable.asyncio, 'sleep', no_wait)
+    return recorded
+
+
+def run_trigger(responses):
+    """
+    Run ExchangeRateTrigger against a local server answering with
+    responses in turn (the last one repeats)
+
+    Returns:
+        Tuple of (event payloads, query parameters of each request)
+    """
+    requests = []
+
+    async def handler(request):
+        requests.append(dict(request.query))
+        status, body = responses[min(len(requests), len(responses)) - 1]
+        return web.Response(status=status, text=body if isinstance(body, str) else json.dumps(body))
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_get('/latest', handler)
+        async with TestServer(app) as server:
+            trigger = ExchangeRateTrigger(api_url=str(server.make_url('/latest')), timeout=5)
+            return [event.payload async for event in trigger.run()]
+
+    return asyncio.run(scenario()), requests
+
+
+def test_success(delays):
+    events, requests = run_trigger([(200, RATES)])
+
+    assert events == [{'status': 'success', 'exchange_rate': 105.5}]
+    assert requests == [{'base': 'GBP', 'symbols': 'INR'}]
+    assert delays == []
+
+
+def test_retries_transient_errors_with_backoff(delays):
+    events, requests = run_trigger([(503, 'busy'), (429, 'slow down'), (200, RATES)])
+
+    assert events == [{'status': 'success', 'exchange_rate': 105.5}]
+    assert len(requests) == 3
+    assert delays == [0.5, 1.0]
+
+
+def test_gives_up_after_retry_total(delays):
+    events, requests = run_trigger([(503, 'busy')])
+
+    assert len(requests) == RETRY_TOTAL + 1
+    assert delays == [0.5, 1.0, 2.0]
+    assert [event['status'] for event in events] == ['error']
+    assert '503' in events[0]['message']
+
+
+def test_client_errors_are_not_retried(delays):
+    events, requests = run_trigger([(404, 'no such endpoint')])
+
+    assert len(requests) == 1
+    assert delays == []
+    assert [event['status'] for event in events] == ['error']
+
+
+def test_connection_errors_are_retried_then_reported(delays):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    trigger = ExchangeRateTrigger(api_url=f'http://127.0.0.1:{port}/latest', timeout=5)
+
+    async def collect():
+        return [event.payload async for event in trigger.run()]
+
+    events = asyncio.run(collect())
+
+    assert delays == [0.5, 1.0, 2.0]
+    assert [event['status'] for event in events] == ['error']
+    assert events[0]['message'].startswith('Error fetching exchange rate')
+
+
+@pytest.mark.parametrize('body', [
+    'not json',
+    [105.5],
+    {'rates': ['INR', 105.5]},
+    {'rates': {'INR': 'n/a'}},
+    {'rates': {'INR': {'value': 105.5}}},
+])
+def test_bad_body_is_an_error_event(delays, body):
+    events, requests = run_trigger([(200, body)])
+
+    assert len(requests) == 1
+    assert [event['status'] for event in events] == ['error']
+    assert events[0]['message'].startswith('Invalid exchange rate response')
+
+
+@pytest.mark.parametrize('body', [{'success': False, 'error': 'quota'}, {'rates': {}}])
+def test_missing_rate_is_an_error_event(delays, body):
+    events, _ = run_trigger([(200, body)])
+
+    assert events == [{'status': 'error', 'message': 'Exchange rate not found in response'}]
+
+
+def test_serialize_round_trip():
+    trigger = ExchangeRateTrigger('EUR', 'USD', 'http://rates.test/latest', timeout=3)
+
+    path, kwargs = trigger.serialize()
+
+    assert path == 'deferrable.ExchangeRateTrigger'
+    assert ExchangeRateTrigger(**kwargs).serialize() == (path, kwargs)
+
+
+@pytest.mark.parametrize('event', [None, {'status': 'error', 'message': 'boom'}])
+def test_execute_complete_raises_on_error_event(event):
+    operator = FetchExchangeRateOperator(task_id='fetch_exchange_rate', db_config={})
+
+    with pytest.raises(AirflowException, match='Failed to fetch exchange rate'):
+        operator.execute_complete({}, event)
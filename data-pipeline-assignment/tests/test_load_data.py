@@ -0,0 +1,77 @@
+"""
+Tests for the database-free parts of scripts/load_data.py
+"""
+import tracemalloc
+from dataclasses import asdict, fields
+
+import pyarrow as pa
+
+import load_data
+from load_data import (
+    PRODUCT_COLUMNS,
+    _product_rows,
+    read_products_parquet,
+    write_tables_parquet,
+)
+from transform_data import Product, iter_transform_tables, transform_products
+
+EXCHANGE_RATE = 105.5
+
+
+def test_write_tables_parquet_round_trip(tmp_path, raw_products):
+    path = str(tmp_path / 'products.parquet')
+    raw = raw_products(2_500)
+
+    rows = write_tables_parquet(iter_transform_tables(iter(raw), EXCHANGE_RATE, batch_size=1_000), path)
+
+    assert rows == len(raw)
+    table = read_products_parquet(path)
+    assert table.to_pylist() == [asdict(p) for p in transform_products(raw, EXCHANGE_RATE)]
+
+
+def product_table(count):
+    return pa.table({
+        'price_tier': ['cheap'] * count,
+        'product_id': [f'{i:064x}' for i in range(count)],
+        'title': [f'Book {i}' for i in range(count)],
+        'price_gbp': [float(i) for i in range(count)],
+        'price_inr': [i * 105.5 for i in range(count)],
+        'category': ['Poetry'] * count,
+        'availability_status': ['In Stock'] * count,
+        'stock_quantity': list(range(count)),
+    })
+
+
+def test_product_columns_follow_product_fields():
+    assert PRODUCT_COLUMNS == tuple(field.name for field in fields(Product))
+
+
+def test_product_rows_from_table_are_in_column_order():
+    table = product_table(25)
+
+    rows = list(_product_rows(table))
+
+    assert rows == [tuple(row[col] for col in PRODUCT_COLUMNS) for row in table.to_pylist()]
+    assert list(_product_rows(table.slice(0, 0))) == []
+
+
+def test_product_rows_from_table_convert_one_batch_at_a_time(monkeypatch):
+    monkeypatch.setattr(load_data, 'COPY_BATCH_SIZE', 1_000)
+    table = product_table(100_000)
+
+    tracemalloc.start()
+    try:
+        rows = _product_rows(table)
+        first = next(rows)
+        after_first = tracemalloc.get_traced_memory()[0]
+        count = 1 + sum(1 for _ in rows)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert first[0] == f'{0:064x}'
+    assert count == 100_000
+    # One 1,000-row batch is well under a megabyte; all 100k rows as
+    # Python objects would take tens of megabytes
+    assert after_first < 1_000_000
+    assert peak < 2_000_000
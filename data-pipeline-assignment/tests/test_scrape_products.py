@@ -0,0 +1,154 @@
+"""
+Tests for listing and detail-page parsing in scripts/scrape_products.py
+"""
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from lxml import html
+
+from scrape_products import (
+    _HTML_PARSER,
+    _PARSE_BLOCK_SIZE,
+    _PRODUCT_XP,
+    _find_category,
+    parse_category,
+    parse_product_card,
+    scrape_books_async,
+)
+
+HEAD = b'<!DOCTYPE html><html><head><title>A Light in the Attic</title>' + b'<meta name="x">' * 200 + b'</head><body>'
+BREADCRUMB = (
+    b'<ul class="breadcrumb"><li><a href="/">Home</a></li>'
+    b'<li><a href="/books">Books</a></li>'
+    b'<li><a href="/poetry">\n  Poetry\n</a></li>'
+    b'<li class="active">A Light in the Attic</li></ul>'
+)
+PAGE = HEAD + BREADCRUMB + b'<article>' + b'<p>Description</p>' * 200 + b'</article></body></html>'
+
+
+def test_find_category_full_page():
+    assert len(HEAD) > _PARSE_BLOCK_SIZE
+    assert _find_category(PAGE) == 'Poetry'
+    assert _find_category(PAGE, complete=False) == 'Poetry'
+    assert parse_category(PAGE) == 'Poetry'
+
+
+def test_find_category_truncated_page():
+    breadcrumb_end = PAGE.index(b'</ul>') + len(b'</ul>')
+
+    # Cut off before the breadcrumb closes: not known yet, rather than 'Unknown'
+    for cut in (0, 10, len(HEAD), PAGE.index(b'Poetry'), breadcrumb_end - 1):
+        assert _find_category(PAGE[:cut], complete=False) is None
+
+    # Cut off after it: the category is already there
+    assert _find_category(PAGE[:breadcrumb_end + 1], complete=False) == 'Poetry'
+
+
+def test_find_category_without_breadcrumb():
+    page = HEAD + b'<ul class="nav"><li>Home</li></ul></body></html>'
+
+    assert _find_category(page) == 'Unknown'
+    assert _find_category(page, complete=False) is None
+    assert _find_category(HEAD + BREADCRUMB.replace(b'<li><a href="/poetry">\n  Poetry\n</a></li>', b'')) == 'Unknown'
+
+
+def product_card(slug, title, price, availability='In stock', css_class='product_pod'):
+    """A listing-page product card as books.toscrape.com renders it"""
+    return (
+        f'<article class="{css_class}">'
+        f'<div class="image_container"><a href="{slug}/index.html"><img src="thumb.jpg"></a></div>'
+        f'<p class="star-rating Three"></p>'
+        f'<h3><a href="{slug}/index.html" title="{title}">{title[:10]}...</a></h3>'
+        f'<div class="product_price"><p class="price_color">\u00a3{price}</p>'
+        f'<p class="instock availability"><i class="icon-ok"></i>\n    {availability}\n</p></div>'
+        f'</article>'
+    )
+
+
+def listing_page(*cards):
+    return (
+        '<!DOCTYPE html><html><body><ol class="row">'
+        + ''.join(f'<li>{card}</li>' for card in cards)
+        + '</ol></body></html>'
+    ).encode('utf-8')
+
+
+def detail_page(category):
+    return HEAD + BREADCRUMB.replace(b'Poetry', category.encode('utf-8')) + b'</body></html>'
+
+
+def test_parse_product_card_from_listing_page():
+    page = listing_page(
+        product_card('a-light-in-the-attic_1000', 'A Light in the Attic', '51.77'),
+        product_card('sharp-objects_997', 'Sharp Objects', '47.82', 'Out of stock', css_class='product_pod  featured'),
+        '<article class="product_pod"><h3>No link</h3><p class="price_color">\u00a31.00</p></article>',
+        '<article class="product_podcast"><h3><a href="x/index.html" title="Not a product">x</a></h3></article>',
+    )
+    document = html.fromstring(page, parser=_HTML_PARSER)
+
+    cards = [parse_product_card(product, 'http://books') for product in _PRODUCT_XP(document)]
+
+    assert cards == [
+        {
+            'title': 'A Light in the Attic',
+            'price_gbp': 51.77,
+            'availability': 'In stock',
+            'detail_url': 'http://books/catalogue/a-light-in-the-attic_1000/index.html',
+        },
+        {
+            'title': 'Sharp Objects',
+            'price_gbp': 47.82,
+            'availability': 'Out of stock',
+            'detail_url': 'http://books/catalogue/sharp-objects_997/index.html',
+        },
+        None,
+    ]
+
+
+def test_scrape_books_async():
+    listings = {
+        'page-1.html': listing_page(
+            product_card('a-light-in-the-attic_1000', 'A Light in the Attic', '51.77'),
+            product_card('tipping-the-velvet_999', 'Tipping the Velvet', '53.74'),
+        ),
+        'page-2.html': listing_page(
+            product_card('a-light-in-the-attic_1000', 'A Light in the Attic', '51.77'),
+            product_card('unlisted_1', 'Unlisted', '10.00'),
+        ),
+        # page-3.html is missing, so the crawl stops before page 4
+        'page-4.html': listing_page(product_card('never-reached_2', 'Never Reached', '1.00')),
+    }
+    details = {
+        'a-light-in-the-attic_1000': detail_page('Poetry'),
+        'tipping-the-velvet_999': detail_page('Historical Fiction'),
+        'unlisted_1': HEAD + b'<ul class="nav"><li>Home</li></ul></body></html>',
+    }
+    detail_requests = []
+
+    async def listing(request):
+        if request.match_info['page'] not in listings:
+            raise web.HTTPNotFound()
+        return web.Response(body=listings[request.match_info['page']], content_type='text/html')
+
+    async def detail(request):
+        detail_requests.append(request.match_info['slug'])
+        return web.Response(body=details[request.match_info['slug']], content_type='text/html')
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_get(r'/catalogue/{page:page-\d+\.html}', listing)
+        app.router.add_get('/catalogue/{slug}/index.html', detail)
+        async with TestServer(app) as server:
+            return await scrape_books_async(base_url=str(server.make_url('')).rstrip('/'), max_pages=4)
+
+    products = asyncio.run(scenario())
+
+    assert products == [
+        {'title': 'A Light in the Attic', 'price_gbp': 51.77, 'category': 'Poetry', 'availability': 'In stock'},
+        {'title': 'Tipping the Velvet', 'price_gbp': 53.74, 'category': 'Historical Fiction', 'availability': 'In stock'},
+        {'title': 'A Light in the Attic', 'price_gbp': 51.77, 'category': 'Poetry', 'availability': 'In stock'},
+        {'title': 'Unlisted', 'price_gbp': 10.0, 'category': 'Unknown', 'availability': 'In stock'},
+    ]
+    # Each distinct detail page is fetched once
+    assert sorted(detail_requests) == sorted(details)
@@ -0,0 +1,219 @@
+"""
+Tests for the product transformations in scripts/transform_data.py
+"""
+import json
+import os
+import warnings
+from dataclasses import asdict
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+import transform_data
+from transform_data import (
+    PARALLEL_THRESHOLD,
+    PRODUCT_SCHEMA,
+    VECTORIZE_THRESHOLD,
+    _distinct_products,
+    _round_cents,
+    iter_transform_tables,
+    transform_product,
+    transform_products,
+    transform_products_table,
+)
+
+EXCHANGE_RATE = 105.5
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+
+
+def load_golden(name):
+    with open(os.path.join(GOLDEN_DIR, name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+# Raw products (odd values included) and, per exchange rate, the output
+# of the original per-row transform_product for each one (null if skipped)
+GOLDEN_RAW = load_golden('raw_products.json')
+GOLDEN_EXPECTED = load_golden('expected_products.json')
+
+
+def exact(products):
+    """Products as {field: repr(value)}, so types, NaN and -0.0 must match too"""
+    return [
+        None if p is None else {k: repr(v) for k, v in (p if isinstance(p, dict) else asdict(p)).items()}
+        for p in products
+    ]
+
+
+@pytest.fixture(autouse=True)
+def vectorize_small_batches(monkeypatch):
+    # The small test batches would otherwise skip the column-wise path
+    monkeypatch.setattr(transform_data, 'VECTORIZE_THRESHOLD', 0)
+
+
+@pytest.fixture(scope='module')
+def large_batch(raw_products):
+    return raw_products(PARALLEL_THRESHOLD + 10_000)
+
+
+def test_parallel_pool_matches_single_process(large_batch, monkeypatch):
+    pools = []
+
+    class RecordingPool(transform_data.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(kwargs.get('max_workers'))
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(transform_data, 'ProcessPoolExecutor', RecordingPool)
+
+    serial = transform_products(large_batch, EXCHANGE_RATE, max_workers=1)
+    assert pools == []
+
+    parallel = transform_products(large_batch, EXCHANGE_RATE, max_workers=2)
+    assert pools == [2]
+
+    assert len(serial) == len(large_batch)
+    assert parallel == serial
+
+
+def test_small_batches_are_transformed_per_row(raw_products, monkeypatch):
+    products = raw_products(VECTORIZE_THRESHOLD - 1) + [None]
+    vectorized = transform_products(products, EXCHANGE_RATE)
+
+    monkeypatch.setattr(transform_data, 'VECTORIZE_THRESHOLD', VECTORIZE_THRESHOLD)
+    monkeypatch.setattr(transform_data, '_transform_distinct', None)
+
+    assert exact(transform_products(products[:-1], EXCHANGE_RATE)) == exact(vectorized)
+    assert transform_products_table(products, EXCHANGE_RATE).to_pylist() == [asdict(p) for p in vectorized]
+
+
+def test_tables_match_products(raw_products):
+    products = raw_products(2_500)
+    expected = [asdict(p) for p in transform_products(products, EXCHANGE_RATE)]
+
+    table = transform_products_table(products, EXCHANGE_RATE)
+    assert table.schema == PRODUCT_SCHEMA
+    assert table.to_pylist() == expected
+
+    tables = list(iter_transform_tables(iter(products), EXCHANGE_RATE, batch_size=1_000))
+    assert [t.num_rows for t in tables] == [1_000, 1_000, 500]
+    assert pa.concat_tables(tables).to_pylist() == expected
+
+
+def test_malformed_products_are_skipped(raw_products):
+    products = raw_products(3)
+    products[1] = {'title': 'Broken', 'price_gbp': 'n/a', 'category': 'poetry', 'availability': ''}
+
+    transformed = transform_products(products, EXCHANGE_RATE)
+
+    assert [p.title for p in transformed] == ['Book 0', 'Book 2']
+    assert sum(t.num_rows for t in iter_transform_tables(products, EXCHANGE_RATE)) == 2
+    assert transform_products_table(products, EXCHANGE_RATE).num_rows == 2
+
+
+@pytest.mark.parametrize('golden', GOLDEN_EXPECTED, ids=lambda g: f"rate={g['exchange_rate']}")
+def test_transform_product_matches_golden(golden):
+    transformed = [transform_product(dict(p), golden['exchange_rate']) for p in GOLDEN_RAW]
+
+    assert exact(transformed) == exact(golden['products'])
+
+
+@pytest.mark.parametrize('golden', GOLDEN_EXPECTED, ids=lambda g: f"rate={g['exchange_rate']}")
+def test_transform_products_matches_golden(golden):
+    expected = exact(p for p in golden['products'] if p is not None)
+
+    assert exact(transform_products([dict(p) for p in GOLDEN_RAW], golden['exchange_rate'])) == expected
+
+    tables = iter_transform_tables((dict(p) for p in GOLDEN_RAW), golden['exchange_rate'], batch_size=100)
+    assert exact(pa.concat_tables(tables).to_pylist()) == expected
+
+
+def test_round_cents_matches_round():
+    rnd = np.random.default_rng(15)
+    half_cents = (np.arange(-20_000, 20_000) + 0.5) / 100
+    candidates = np.concatenate([
+        half_cents,
+        np.nextafter(half_cents, np.inf),
+        np.nextafter(half_cents, -np.inf),
+        np.round(rnd.uniform(0, 100, 20_000), 2) * 110.2345,
+        np.round(rnd.uniform(0, 100, 20_000), 2) * 104.8731,
+        [0.0, -0.0, -0.004, 2.675, 1e6 + 0.005, 2.0 ** 52, 1e300, -1e300, np.inf, -np.inf, np.nan],
+    ])
+
+    rounded = _round_cents(candidates)
+
+    assert [repr(v) for v in rounded] == [repr(round(v, 2)) for v in candidates.tolist()]
+
+
+def test_distinct_products_keeps_zero_like_prices_apart():
+    base = {'title': 'Free', 'category': 'Poetry', 'availability': 'In stock'}
+    products = [
+        {**base, 'price_gbp': 0},
+        {**base, 'price_gbp': 0.0},
+        {**base, 'price_gbp': -0.0},
+        {**base, 'price_gbp': False},
+        {**base, 'price_gbp': None},
+        dict(base),
+        {**base, 'price_gbp': 0.0},
+    ]
+
+    distinct, index = _distinct_products(products)
+
+    # A missing price defaults to 0, so only it and the repeated 0.0 merge
+    assert index == [0, 1, 2, 3, 4, 0, 1]
+    assert [repr(p.get('price_gbp', 0)) for p in distinct] == ['0', '0.0', '-0.0', 'False', 'None']
+
+    expected = [transform_product(dict(p), EXCHANGE_RATE) for p in products]
+    assert exact(transform_products(products, EXCHANGE_RATE)) == exact(p for p in expected if p is not None)
+
+
+def test_unencodable_text_is_malformed(raw_products):
+    products = raw_products(3)
+    products[1] = {**products[1], 'title': 'Broken \ud800'}
+    products[2] = {**products[2], 'category': '\udfff'}
+
+    assert transform_product(products[1], EXCHANGE_RATE) is None
+    assert transform_product(products[2], EXCHANGE_RATE) is None
+    assert [p.title for p in transform_products(products, EXCHANGE_RATE)] == ['Book 0']
+    assert transform_products_table(products, EXCHANGE_RATE).num_rows == 1
+
+
+def test_non_dict_rows_are_malformed(raw_products):
+    # Enough repeats for the batch path to deduplicate
+    products = raw_products(2) * 3 + [None, 'Book', None]
+
+    assert transform_product(None, EXCHANGE_RATE) is None
+    assert transform_product('Book', EXCHANGE_RATE) is None
+    assert transform_products(products, EXCHANGE_RATE) == transform_products(products[:6], EXCHANGE_RATE)
+    assert sum(t.num_rows for t in iter_transform_tables(products, EXCHANGE_RATE)) == 6
+
+
+def test_price_overflow_matches_per_row_without_warnings(raw_products):
+    products = raw_products(3)
+    products[1] = {**products[1], 'price_gbp': 1e307}
+    products[2] = {**products[2], 'price_gbp': 1e305}
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        transformed = transform_products(products, EXCHANGE_RATE)
+
+    assert exact(transformed) == exact(transform_product(p, EXCHANGE_RATE) for p in products)
+    assert transformed[1].price_inr == float('inf')
+
+
+@pytest.mark.parametrize('price', [
+    complex(12, 5),
+    np.datetime64('NaT'),
+    np.timedelta64('NaT'),
+    np.timedelta64(5, 's'),
+    True,
+], ids=repr)
+def test_prices_of_other_numeric_types_match_per_row(price):
+    # Uniform columns, which pandas would infer a numeric dtype for
+    products = [{'title': 'Odd price', 'price_gbp': price, 'category': 'Poetry', 'availability': 'In stock'}] * 2
+
+    expected = [transform_product(p, EXCHANGE_RATE) for p in products]
+
+    assert exact(transform_products(products, EXCHANGE_RATE)) == exact(p for p in expected if p is not None)